@@ -0,0 +1,51 @@
+"""CPU cost of client operations, served in process by FakeTransport.
+
+Usage: python -m benchmarks.client_overhead [count] [--profile]
+"""
+import asyncio
+import cProfile
+import pstats
+import sys
+import time
+
+from loguru import logger
+
+from whatsapp import WhatsAppClient, WhatsAppConfig
+from whatsapp.transport import FakeTransport
+
+TO = "972500000000"
+
+
+async def main(count: int, profile: bool):
+    logger.disable("whatsapp")
+    config = WhatsAppConfig(endpoint="http://fake", wa_id=TO, use_token=False)
+    transport = FakeTransport(media={"1": bytes(64 * 1024)})
+    async with WhatsAppClient(config, transport=transport) as client:
+        operations = [
+            ("send_text", lambda: client.send_text(TO, "Hello")),
+            ("groups", client.groups),
+            ("upload", lambda: client.upload(b"\0" * 1024, "image/png")),
+            ("get_media", lambda: client.get_media("1")),
+            ("download_media", lambda: client.download_media("1")),
+        ]
+
+        profiler = cProfile.Profile() if profile else None
+        print(f"{count} operations each")
+        for name, operation in operations:
+            if profiler:
+                profiler.enable()
+            start = time.process_time()
+            for _ in range(count):
+                await operation()
+            elapsed = time.process_time() - start
+            if profiler:
+                profiler.disable()
+            print(f"  {name:16} {elapsed / count * 1e6:8.1f} us/op")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    asyncio.run(main(int(args[0]) if args else 5000, "--profile" in sys.argv))
@@ -0,0 +1,66 @@
+"""Memory of incoming.Message vs CompactMessage.
+
+Usage: python -m benchmarks.compact_messages [count]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from whatsapp import incoming
+from whatsapp.compact import CompactMessage
+
+SAMPLES = [
+    {
+        "id": "wamid.HBgMOTcyNTQzMDg5MTY3FQIAEhgUM0E2QjE0RkY3MzY2RjBFMjA0RDYA",
+        "timestamp": "1703415322",
+        "from": "972543089167",
+        "type": "text",
+        "text": {"body": "Hello, I would like to order the blue one"},
+    },
+    {
+        "id": "wamid.HBgMOTcyNTQzMDg5MTY3FQIAEhgUM0FCNDFCMDE4QkQ5MUFGMTNCNzMA",
+        "timestamp": "1703415388",
+        "from": "972543089167",
+        "type": "image",
+        "image": {
+            "id": "1043563526930128",
+            "mime_type": "image/jpeg",
+            "sha256": "kqxLq3yNKsUk7sHRX1RIgDtTfqvzZNlJYfAYTcXGTyU=",
+        },
+    },
+]
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = build(count)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, size, elapsed
+
+
+def build_models(count):
+    return [incoming.Message.parse_obj(SAMPLES[i % len(SAMPLES)]) for i in range(count)]
+
+
+def build_compact(count):
+    return [CompactMessage.from_message(m) for m in build_models(count)]
+
+
+def main(count: int):
+    print(f"{count} messages")
+    for name, build in [
+        ("incoming.Message", build_models),
+        ("CompactMessage", build_compact),
+    ]:
+        items, size, elapsed = measure(build, count)
+        print(f"  {name:16} {size / count:8.1f} B/message, built in {elapsed:.2f}s")
+        del items
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,49 @@
+"""Normalizing phone numbers one regex at a time vs phones.normalize_many.
+
+Usage: python -m benchmarks.phones [count]
+"""
+import random
+import re
+import sys
+import time
+
+from loguru import logger
+
+from whatsapp import phones
+
+FORMATS = ["+972 50-{0}", "050{0}", "(050) {0}", "972-50-{0}", "00972 50 {0}"]
+_NON_DIGITS = re.compile(r"[^\d+]")
+
+
+def regex_normalize(numbers, country_code):
+    result = []
+    for number in numbers:
+        digits = _NON_DIGITS.sub("", number)
+        if digits.startswith("+"):
+            digits = digits[1:]
+        elif digits.startswith("00"):
+            digits = digits[2:]
+        elif digits.startswith("0"):
+            digits = country_code + digits[1:]
+        if 8 <= len(digits) <= 15:
+            result.append(digits)
+    return list(dict.fromkeys(result))
+
+
+def main(count: int):
+    logger.disable("whatsapp")
+    rng = random.Random(0)
+    numbers = [rng.choice(FORMATS).format(rng.randrange(10**7)) for _ in range(count)]
+    print(f"{count} numbers")
+    for name, normalize in [
+        ("regex", regex_normalize),
+        ("normalize_many", phones.normalize_many),
+    ]:
+        start = time.perf_counter()
+        normalize(numbers, "972")
+        elapsed = time.perf_counter() - start
+        print(f"  {name:16} {count / elapsed / 1e6:6.2f}M numbers/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
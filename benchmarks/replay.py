@@ -0,0 +1,33 @@
+"""Throughput of replaying an ndjson file of webhook bodies.
+
+Usage: python -m benchmarks.replay path [--rate RATE] [--fast]
+"""
+import argparse
+import asyncio
+
+from loguru import logger
+
+from whatsapp.replay import replay
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay an ndjson file of webhook bodies, reporting throughput"
+    )
+    parser.add_argument("path")
+    parser.add_argument("--rate", type=float, help="updates per second")
+    parser.add_argument("--fast", action="store_true", help="skip model validation")
+    args = parser.parse_args()
+
+    logger.disable("whatsapp")
+    stats = asyncio.run(
+        replay(args.path, lambda update: None, args.rate, fast=args.fast)
+    )
+    print(
+        f"{stats.updates} updates in {stats.elapsed:.2f}s ({stats.rate:.0f}/s), "
+        f"parsing {stats.parse_rate:.0f}/s, {stats.parse_errors} parse errors"
+    )
+
+
+if __name__ == "__main__":
+    main()
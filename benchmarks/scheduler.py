@@ -0,0 +1,72 @@
+"""Memory per scheduled message: a sleeping task each vs SendScheduler.
+
+Usage: python -m benchmarks.scheduler [count]
+"""
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from whatsapp import WhatsAppClient, WhatsAppConfig, messages
+from whatsapp.scheduler import SendScheduler
+from whatsapp.transport import FakeTransport
+
+MESSAGE = messages.Message(
+    to="972500000001",
+    type=messages.MessageType.TEXT,
+    text=messages.Text(body="Your appointment is tomorrow at 10:00"),
+)
+
+
+async def measure(name, schedule, count):
+    gc.collect()
+    tracemalloc.start()
+    state = await schedule(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:16} {size / count:8.1f} B/message")
+    return state
+
+
+async def sleeping_tasks(count):
+    async def send_later(message, delay):
+        await asyncio.sleep(delay)
+
+    return [asyncio.ensure_future(send_later(MESSAGE, 3600)) for _ in range(count)]
+
+
+async def main(count: int):
+    config = WhatsAppConfig(
+        endpoint="http://fake", wa_id="972500000000", use_token=False
+    )
+    at = time.time() + 3600
+    print(f"{count} messages")
+    async with WhatsAppClient(config, transport=FakeTransport()) as client:
+        tasks = await measure("sleeping tasks", sleeping_tasks, count)
+        for task in tasks:
+            task.cancel()
+        del tasks
+
+        async def in_memory(count):
+            scheduler = SendScheduler(client)
+            scheduler.schedule_many((MESSAGE, at) for _ in range(count))
+            return scheduler
+
+        await measure("in memory", in_memory, count)
+
+        with tempfile.TemporaryDirectory() as directory:
+
+            async def persisted(count):
+                scheduler = SendScheduler(client, os.path.join(directory, "db"))
+                scheduler.schedule_many((MESSAGE, at) for _ in range(count))
+                return scheduler
+
+            scheduler = await measure("sqlite", persisted, count)
+            await scheduler.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
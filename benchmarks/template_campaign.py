@@ -0,0 +1,69 @@
+"""Rendering template payloads from a skeleton vs building the model per row.
+
+Usage: python -m benchmarks.template_campaign [count]
+"""
+import sys
+import time
+
+from whatsapp import messages
+from whatsapp._models.template import (
+    Currency,
+    Template,
+    TemplateComponent,
+    TemplateLanguage,
+    TemplateParameter,
+)
+from whatsapp.campaign import TemplateCampaign, slot
+
+
+def make_template(name: str, amount: str) -> Template:
+    return Template(
+        name="order_ready",
+        language=TemplateLanguage(policy="deterministic", code="en"),
+        components=[
+            TemplateComponent(
+                type="body",
+                parameters=[
+                    TemplateParameter(type="text", text=name),
+                    TemplateParameter(
+                        type="currency",
+                        currency=Currency(
+                            fallback_value="$", code="USD", amount_1000=amount
+                        ),
+                    ),
+                ],
+            )
+        ],
+    )
+
+
+def build_models(rows):
+    for row in rows:
+        messages.Message(
+            to=row["to"],
+            type=messages.MessageType.TEMPLATE,
+            template=make_template(row["name"], row["amount"]),
+        ).json(exclude_none=True)
+
+
+def render(rows):
+    campaign = TemplateCampaign(make_template(slot("name"), slot("amount")))
+    for row in rows:
+        campaign.render(row)
+
+
+def main(count: int):
+    rows = [
+        {"to": f"9725{i:08}", "name": f"Customer {i}", "amount": str(i * 1000)}
+        for i in range(count)
+    ]
+    print(f"{count} rows")
+    for name, run in [("models", build_models), ("skeleton", render)]:
+        start = time.perf_counter()
+        run(rows)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:10} {count / elapsed:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,168 @@
+"""Send throughput of the aiohttp and httpx transports against local servers.
+
+Usage: python -m benchmarks.transports [count] [concurrency]
+
+Both servers use TLS with a throwaway self-signed certificate (made with the
+openssl command), like the real endpoints: an aiohttp server speaking
+HTTP/1.1 for aiohttp and httpx over HTTP/1.1, and a minimal h2 server for
+httpx over HTTP/2, where concurrent sends are multiplexed over one
+connection. Needs `httpx[http2]`.
+"""
+import asyncio
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession, TCPConnector, web
+from aiohttp.test_utils import TestServer
+import h2.config
+import h2.connection
+import h2.events
+from loguru import logger
+
+from whatsapp import WhatsAppClient, WhatsAppConfig
+from whatsapp.transport import HttpxTransport
+
+RESPONSE = {
+    "messaging_product": "whatsapp",
+    "contacts": [{"input": "972500000000", "wa_id": "972500000000"}],
+    "messages": [{"id": "wamid.1"}],
+}
+
+
+async def messages(request):
+    await request.read()
+    return web.json_response(RESPONSE)
+
+
+class H2Server(asyncio.Protocol):
+    """Answer every request with `RESPONSE`, over HTTP/2 only"""
+
+    connections = 0
+    body = web.json_response(RESPONSE).body
+
+    def connection_made(self, transport: asyncio.Transport):
+        H2Server.connections += 1
+        self.transport = transport
+        self.connection = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False)
+        )
+        self.connection.initiate_connection()
+        self.transport.write(self.connection.data_to_send())
+
+    def data_received(self, data: bytes):
+        for event in self.connection.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                self.connection.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                self.connection.send_headers(
+                    event.stream_id,
+                    [
+                        (":status", "200"),
+                        ("content-type", "application/json"),
+                        ("content-length", str(len(self.body))),
+                    ],
+                )
+                self.connection.send_data(event.stream_id, self.body, end_stream=True)
+        self.transport.write(self.connection.data_to_send())
+
+
+def self_signed_certificate(directory: str):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes"]
+        + ["-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=localhost"]
+        + ["-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def server_context(cert: str, key: str, protocol: str) -> ssl.SSLContext:
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    context.set_alpn_protocols([protocol])
+    return context
+
+
+async def run(client: WhatsAppClient, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i: int):
+        async with semaphore:
+            await client.send_text("972500000000", f"message {i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(count)))
+    return time.perf_counter() - start
+
+
+async def main(count: int, concurrency: int):
+    logger.disable("whatsapp")
+    app = web.Application()
+    app.router.add_post("/messages", messages)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = self_signed_certificate(directory)
+        http1 = TestServer(app, host="127.0.0.1")
+        await http1.start_server(ssl=server_context(cert, key, "http/1.1"))
+        http2 = await asyncio.get_running_loop().create_server(
+            H2Server, "127.0.0.1", 0, ssl=server_context(cert, key, "h2")
+        )
+        http2_url = f"https://127.0.0.1:{http2.sockets[0].getsockname()[1]}"
+
+        def trusted():
+            return ssl.create_default_context(cafile=cert)
+
+        print(f"{count} sends, {concurrency} concurrent, over TLS")
+        try:
+            for name, endpoint, make_client in [
+                (
+                    "aiohttp",
+                    str(http1.make_url("")).rstrip("/"),
+                    lambda config: WhatsAppClient(
+                        config,
+                        session=ClientSession(connector=TCPConnector(ssl=trusted())),
+                    ),
+                ),
+                (
+                    "httpx/1.1",
+                    str(http1.make_url("")).rstrip("/"),
+                    lambda config: WhatsAppClient(
+                        config, transport=HttpxTransport(http2=False, verify=trusted())
+                    ),
+                ),
+                (
+                    "httpx/2",
+                    http2_url,
+                    lambda config: WhatsAppClient(
+                        config, transport=HttpxTransport(verify=trusted())
+                    ),
+                ),
+            ]:
+                config = WhatsAppConfig(
+                    endpoint=endpoint, wa_id="972500000000", use_token=False
+                )
+                async with make_client(config) as client:
+                    elapsed = await run(client, count, concurrency)
+                print(f"  {name:10} {count / elapsed:8.0f} sends/s")
+            print(f"  HTTP/2 connections: {H2Server.connections}")
+        finally:
+            await http1.close()
+            http2.close()
+            await http2.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        )
+    )
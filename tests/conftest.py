@@ -0,0 +1,30 @@
+from typing import Dict, Optional
+
+import pytest
+
+from whatsapp import WhatsAppClient, WhatsAppConfig
+from whatsapp.transport import FakeTransport
+
+
+@pytest.fixture
+def make_client():
+    """Build clients of a fake account served by a `FakeTransport`.
+
+    The transport is made from `routes`, `media` and `latency` unless one is
+    given, other keyword arguments are passed to the client.
+    """
+
+    def make(
+        routes: Optional[Dict] = None,
+        media: Optional[Dict[str, bytes]] = None,
+        latency: float = 0.0,
+        transport: Optional[FakeTransport] = None,
+        wa_id: str = "972500000000",
+        **options,
+    ) -> WhatsAppClient:
+        config = WhatsAppConfig(endpoint="http://fake", wa_id=wa_id, use_token=False)
+        if transport is None:
+            transport = FakeTransport(routes, media, latency)
+        return WhatsAppClient(config, transport=transport, **options)
+
+    return make
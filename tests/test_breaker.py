@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from whatsapp import errors
+from whatsapp.breaker import CircuitBreaker, CircuitState
+
+
+async def request(breaker, error=None):
+    async with breaker.guard("endpoint"):
+        if error is not None:
+            raise error
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(ClientConnectionError):
+            await request(breaker, ClientConnectionError())
+
+    assert breaker.state("endpoint") == CircuitState.OPEN
+    with pytest.raises(errors.CircuitOpenError):
+        await request(breaker)
+    assert breaker.state("other") == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_open_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    with pytest.raises(errors.RequestError):
+        await request(breaker, errors.RequestError(400, "Bad Request", "", None))
+
+    assert breaker.state("endpoint") == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_circuit_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    with pytest.raises(asyncio.TimeoutError):
+        await request(breaker, asyncio.TimeoutError())
+    assert breaker.state("endpoint") == CircuitState.HALF_OPEN
+
+    probe = breaker.guard("endpoint")
+    await probe.__aenter__()
+    with pytest.raises(errors.CircuitOpenError):
+        await request(breaker)
+    await probe.__aexit__(None, None, None)
+
+    assert breaker.state("endpoint") == CircuitState.CLOSED
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from whatsapp.cache import ExpiringCache, UploadCache
+from whatsapp.transport import FakeTransport
+
+
+def test_expiring_cache_expires_entries():
+    cache = ExpiringCache(ttl=60)
+    cache.set("fresh", "value")
+    cache.set("stale", "value", ttl=-1)
+
+    assert cache.get("fresh") == "value"
+    assert cache.get("stale") is None
+    assert "stale" not in cache
+
+
+def test_expiring_cache_persists_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ExpiringCache(ttl=60, path=path)
+    cache.set("key", {"id": "1"})
+    cache.close()
+
+    assert ExpiringCache(ttl=60, path=path).get("key") == {"id": "1"}
+
+
+def test_upload_cache_is_content_addressed():
+    cache = UploadCache()
+
+    key = cache.key(b"%PDF-1.4", "application/pdf", "http://fake", "972500000000")
+    assert key == cache.key(
+        b"%PDF-1.4", "application/pdf", "http://fake", "972500000000"
+    )
+    assert key != cache.key(b"%PDF-1.4", "image/jpeg", "http://fake", "972500000000")
+    assert key != cache.key(
+        b"%PDF-1.4", "application/pdf", "http://other", "972500000000"
+    )
+    assert key != cache.key(
+        b"%PDF-1.4", "application/pdf", "http://fake", "972500000001"
+    )
+
+    assert cache.media_id(key) is None
+    cache.set(key, "media-id")
+    assert cache.media_id(key) == "media-id"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_uploads_are_not_shared_between_accounts(make_client):
+    cache = UploadCache()
+    transport = FakeTransport()
+    for wa_id in ("972500000000", "972500000000", "972500000001"):
+        client = make_client(transport=transport, wa_id=wa_id, upload_cache=cache)
+        async with client:
+            await client.upload(b"%PDF-1.4", "application/pdf")
+
+    assert transport.count == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_uploads_of_the_same_content_upload_once(
+    tmp_path, make_client
+):
+    path = tmp_path / "brochure.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    async with make_client(latency=0.01, upload_cache=UploadCache()) as client:
+        uploads = await asyncio.gather(
+            *(client.upload(b"%PDF-1.4", "application/pdf") for _ in range(20)),
+            client.upload_path(str(path)),
+        )
+        assert len({upload.media_id for upload in uploads}) == 1
+        assert client.transport.count == 1
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from whatsapp import messages, phones
+from whatsapp._models.template import (
+    Currency,
+    Template,
+    TemplateComponent,
+    TemplateLanguage,
+    TemplateParameter,
+)
+from whatsapp.campaign import TemplateCampaign, read_csv, slot
+from whatsapp.expiry import ExpiryPolicy
+from whatsapp.idempotency import MessageIds
+from whatsapp.transport import FakeTransport
+
+
+def make_template(name: str, amount: str) -> Template:
+    return Template(
+        name="order_ready",
+        language=TemplateLanguage(policy="deterministic", code="en"),
+        components=[
+            TemplateComponent(
+                type="body",
+                parameters=[
+                    TemplateParameter(type="text", text=name),
+                    TemplateParameter(
+                        type="currency",
+                        currency=Currency(
+                            fallback_value="$", code="USD", amount_1000=amount
+                        ),
+                    ),
+                ],
+            )
+        ],
+    )
+
+
+@pytest.fixture
+def campaign():
+    return TemplateCampaign(make_template("{{1}} " + slot("name"), slot("amount")))
+
+
+def test_render(campaign):
+    assert campaign.fields == {"to", "name", "amount"}
+
+    row = {"to": "972500000001", "name": 'Dana "D" \\ Levi', "amount": 12500}
+    expected = messages.Message(
+        to="972500000001",
+        type=messages.MessageType.TEMPLATE,
+        template=make_template('{{1}} Dana "D" \\ Levi', "12500"),
+    )
+    assert json.loads(campaign.render(row)) == json.loads(
+        expected.json(exclude_none=True)
+    )
+
+    with pytest.raises(ValueError):
+        campaign.render({"to": "972500000001", "name": "Dana"})
+
+
+@pytest.mark.asyncio
+async def test_run(campaign, tmp_path, make_client):
+    path = tmp_path / "rows.csv"
+    path.write_text(
+        "to,name,amount\n"
+        "972500000001,Dana,1000\n"
+        "972500000002,Noa\n"
+        "972500000003,Omer,3000\n"
+        "972500000004,Tal,4000\n"
+    )
+    transport = FakeTransport()
+    transport.route(
+        "POST",
+        "/messages",
+        lambda request: (500, "error") if "Tal" in request.data else {"success": True},
+    )
+    async with make_client(transport=transport, message_ids=MessageIds()) as client:
+        stats = await campaign.run(client, read_csv(str(path)), concurrency=2)
+
+    assert (stats.rows, stats.sent, stats.failed) == (4, 2, 2)
+    assert set(stats.errors) == {2, 4}
+    sent = [json.loads(request.data) for request in transport.requests]
+    assert sorted(body["to"] for body in sent) == [
+        "972500000001",
+        "972500000003",
+        "972500000004",
+    ]
+    assert all(body["id"] and body["preview_url"] is False for body in sent)
+    texts = [
+        body["template"]["components"][0]["parameters"][0]["text"] for body in sent
+    ]
+    assert sorted(texts) == ["{{1}} Dana", "{{1}} Omer", "{{1}} Tal"]
+
+
+@pytest.mark.asyncio
+async def test_run_normalizes_recipients_in_chunks(monkeypatch, make_client):
+    monkeypatch.setattr(phones, "BATCH_SIZE", 2)
+    campaign = TemplateCampaign(
+        make_template(slot("name"), slot("amount")), country_code="972"
+    )
+    rows = [
+        {"to": number, "name": "Dana", "amount": 1000}
+        for number in [
+            "050-0000001",
+            "+972500000002",
+            "972500000003",
+            "bad",
+            "0500000005",
+        ]
+    ]
+    async with make_client() as client:
+        stats = await campaign.run(client, iter(rows), concurrency=1)
+
+    assert (stats.rows, stats.sent, stats.failed) == (5, 4, 1)
+    assert set(stats.errors) == {4}
+    assert [json.loads(r.data)["to"] for r in client.transport.requests] == [
+        f"97250000000{i}" for i in (1, 2, 3, 5)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_expired_rows_are_not_sent(make_client):
+    campaign = TemplateCampaign(
+        make_template(slot("name"), slot("amount")), ttl={"seconds": 0}
+    )
+    async with make_client(expiry=ExpiryPolicy()) as client:
+        rows = [{"to": "972500000001", "name": "Dana", "amount": 1000}]
+        stats = await campaign.run(client, rows)
+
+    assert stats.failed == 1 and client.expiry.expired == 1
+    assert client.transport.count == 0
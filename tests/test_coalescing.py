@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from whatsapp import messages
+from whatsapp.coalescing import TextCoalescer
+from whatsapp.priority import Priority
+
+
+def text(to, body, **kwargs):
+    return messages.Message(
+        to=to, type=messages.MessageType.TEXT, text=messages.Text(body=body), **kwargs
+    )
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def send(sent):
+    async def send(message):
+        sent.append((message.to, message.text.body))
+        return len(sent)
+
+    return send
+
+
+@pytest.mark.asyncio
+async def test_texts_to_same_recipient_are_merged(sent, send):
+    coalescer = TextCoalescer(window=0.01)
+
+    results = await asyncio.gather(
+        coalescer.submit(text("1", "Hello"), send),
+        coalescer.submit(text("2", "Hi"), send),
+        coalescer.submit(text("1", "World"), send),
+    )
+
+    assert sorted(sent) == [("1", "Hello\nWorld"), ("2", "Hi")]
+    assert results[0] == results[2]
+    assert (coalescer.sent, coalescer.merged) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_max_length_starts_a_new_message(sent, send):
+    coalescer = TextCoalescer(window=0.01, separator=" ", max_length=11)
+
+    await asyncio.gather(
+        *(coalescer.submit(text("1", body), send) for body in ["Hello", "World", "!"])
+    )
+
+    assert sent == [("1", "Hello World"), ("1", "!")]
+
+
+@pytest.mark.asyncio
+async def test_texts_of_other_priorities_are_not_merged(sent, send):
+    coalescer = TextCoalescer(window=0.01)
+
+    await asyncio.gather(
+        coalescer.submit(text("1", "Hello"), send, Priority.NORMAL),
+        coalescer.submit(text("1", "Later"), send, Priority.BULK),
+        coalescer.submit(text("1", "World"), send, Priority.BULK),
+    )
+
+    assert sent == [("1", "Hello"), ("1", "Later\nWorld")]
+
+
+@pytest.mark.asyncio
+async def test_high_priority_texts_are_sent_right_away(make_client):
+    client = make_client(text_coalescer=TextCoalescer(window=10))
+    async with client:
+        pending = asyncio.ensure_future(client.send_text("972500000001", "Hello"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(
+            client.send_text("972500000001", "1234", priority=Priority.HIGH), 1
+        )
+        await pending
+
+    assert [request.json["text"]["body"] for request in client.transport.requests] == [
+        "Hello",
+        "1234",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_send_cancels_waiting_callers():
+    coalescer = TextCoalescer(window=60)
+
+    async def send(message):
+        await asyncio.sleep(60)
+
+    pending = asyncio.ensure_future(coalescer.submit(text("1", "Hello"), send))
+    await asyncio.sleep(0)
+    flush = asyncio.ensure_future(coalescer.flush())
+    await asyncio.sleep(0)
+    flush.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(pending, 1)
+
+
+def test_replies_are_not_merged():
+    assert TextCoalescer.accepts(text("1", "Hello"))
+    assert not TextCoalescer.accepts(
+        text("1", "Hello", context=messages.Context(message_id="wamid.1"))
+    )
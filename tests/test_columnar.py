@@ -0,0 +1,64 @@
+import pytest
+
+from whatsapp import incoming
+from whatsapp.columnar import ColumnarWriter, scan
+
+
+@pytest.fixture
+def update():
+    return {
+        "contacts": [{"profile": {"name": "Test"}, "wa_id": "972543089167"}],
+        "messages": [
+            {
+                "id": "wamid.1",
+                "timestamp": "1703415322",
+                "from": "972543089167",
+                "type": "text",
+                "text": {"body": "Hello"},
+            },
+            {
+                "id": "wamid.2",
+                "timestamp": "1703415388",
+                "from": "972543089167",
+                "type": "image",
+                "image": {"id": "1", "mime_type": "image/jpeg", "sha256": "abc"},
+            },
+        ],
+        "statuses": [
+            {
+                "id": "wamid.3",
+                "status": "failed",
+                "timestamp": "1703415400",
+                "recipient_id": "972543089167",
+                "errors": [{"code": 131026}],
+            }
+        ],
+    }
+
+
+@pytest.mark.parametrize("format", ["ndjson", "parquet"])
+def test_write_and_scan(tmp_path, update, format):
+    if format == "parquet":
+        pytest.importorskip("pyarrow")
+
+    with ColumnarWriter(str(tmp_path), batch_size=3, format=format) as writer:
+        writer.write(update)
+        writer.write(incoming.WebhookUpdate.parse_obj(update))
+
+    batches = list(scan(str(tmp_path), "messages", ["id", "media_id"], format))
+    assert [list(batch) for batch in batches] == [["id", "media_id"]] * len(batches)
+    assert sum((batch["id"] for batch in batches), []) == ["wamid.1", "wamid.2"] * 2
+    assert sum((batch["media_id"] for batch in batches), []) == [None, "1"] * 2
+
+    (statuses,) = scan(str(tmp_path), "statuses", format=format)
+    assert list(statuses["timestamp"]) == [1703415400] * 2
+    assert statuses["error_code"] == [131026] * 2
+
+
+def test_invalid_timestamps_are_null(tmp_path, update):
+    update["messages"][0]["timestamp"] = "yesterday"
+    with ColumnarWriter(str(tmp_path)) as writer:
+        writer.write(update)
+
+    (messages,) = scan(str(tmp_path), "messages", ["timestamp"])
+    assert messages["timestamp"] == [None, 1703415388]
@@ -0,0 +1,45 @@
+import pytest
+
+from whatsapp import incoming
+from whatsapp.compact import CompactMessage
+
+
+@pytest.fixture(
+    params=[
+        {"type": "text", "text": {"body": "Hello"}},
+        {
+            "type": "image",
+            "image": {"id": "1", "mime_type": "image/jpeg", "sha256": "abc"},
+        },
+        {"type": "unknown", "reaction": {"message_id": "2", "emoji": "+"}},
+        {"type": "unknown"},
+        {
+            "type": "text",
+            "text": {"body": "Hello"},
+            "image": {"id": "1", "mime_type": "image/jpeg", "sha256": "abc"},
+        },
+    ]
+)
+def message(request):
+    return incoming.Message.parse_obj(
+        {
+            "id": "wamid.1",
+            "timestamp": "1703415322",
+            "from": "972543089167",
+            "context": {"id": "wamid.0"},
+            **request.param,
+        }
+    )
+
+
+def test_round_trip(message):
+    compact = CompactMessage.from_message(message)
+
+    assert compact.timestamp == 1703415322
+    assert compact.to_message() == message
+    assert CompactMessage.from_message(compact.to_message()) == compact
+    assert len({compact, CompactMessage.from_message(message)}) == 1
+
+
+def test_media(message):
+    assert CompactMessage.from_message(message).media() == message.media()
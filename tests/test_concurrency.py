@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from whatsapp import errors
+from whatsapp.concurrency import AdaptiveLimiter
+
+
+@pytest.mark.asyncio
+async def test_limits_in_flight_requests():
+    limiter = AdaptiveLimiter(initial=2, max_limit=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_additive_increase_multiplicative_decrease():
+    limiter = AdaptiveLimiter(initial=4, increase=1)
+
+    for _ in range(4):
+        async with limiter.slot():
+            pass
+    assert limiter.limit == 4  # ~4.9
+
+    with pytest.raises(errors.CloudAPIError):
+        async with limiter.slot():
+            raise errors.CloudAPIError(400, "", "throttled", {"code": 130429})
+
+    assert limiter.limit == 2
+    assert limiter.throttled == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slots():
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+
+    async with limiter.slot():
+        waiter = asyncio.ensure_future(limiter._acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+
+    assert limiter.in_flight == 0
+    async with limiter.slot():
+        assert limiter.in_flight == 1
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from whatsapp import responses
+from whatsapp.cache import ExpiringCache
+from whatsapp.directory import Directory
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+        self.contact_calls = 0
+
+    async def groups(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return responses.GroupsResponse(
+            success=True,
+            data=[
+                responses.Group(
+                    id=f"group-{self.calls}",
+                    name="Group",
+                    owner="972500000000",
+                    members=["972500000001", "972500000002"],
+                    created="2023-01-01",
+                )
+            ],
+        )
+
+    async def contacts(self):
+        self.contact_calls += 1
+        return responses.ContactsResponse(
+            success=True,
+            data=[
+                responses.Contact(id=972500000001, info={"Found": True}),
+                responses.Contact(id=972500000002, info={"Found": False}),
+            ],
+        )
+
+
+@pytest.mark.asyncio
+async def test_lookups_share_one_fetch():
+    client = FakeClient()
+    directory = Directory(client)
+
+    groups, group, members = await asyncio.gather(
+        directory.groups(), directory.group("group-1"), directory.members("group-1")
+    )
+
+    assert client.calls == 1
+    assert groups == [group]
+    assert members == ["972500000001", "972500000002"]
+    assert (await directory.contact("+972500000001")).info.found
+
+
+@pytest.mark.asyncio
+async def test_stale_lists_are_refreshed_in_background():
+    client = FakeClient()
+    directory = Directory(client, ttl=0)
+
+    assert await directory.group("group-1") is not None
+    # served from the cache while refreshing
+    assert await directory.group("group-1") is not None
+    await asyncio.sleep(0.01)
+
+    assert client.calls == 2
+    directory.ttl = 60
+    assert await directory.group("group-2") is not None
+
+
+@pytest.mark.asyncio
+async def test_reachable_numbers_are_cached(tmp_path):
+    client = FakeClient()
+    path = str(tmp_path / "reachability.sqlite")
+    directory = Directory(client, reachability=ExpiringCache(ttl=60, path=path))
+
+    numbers = ["+972500000001", "972500000002", "972500000003"]
+    assert await directory.reachable(numbers, batch_size=2) == {
+        "+972500000001": True,
+        "972500000002": False,
+        "972500000003": None,
+    }
+    assert client.contact_calls == 1
+
+    directory = Directory(client, reachability=ExpiringCache(ttl=60, path=path))
+    assert await directory.reachable(numbers[:2]) == {
+        "+972500000001": True,
+        "972500000002": False,
+    }
+    assert client.contact_calls == 1
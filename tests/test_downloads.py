@@ -0,0 +1,210 @@
+import asyncio
+import base64
+from contextlib import asynccontextmanager
+import hashlib
+import io
+import os
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import ClientConnectionError, ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from whatsapp import downloads, errors, incoming
+
+
+@pytest.fixture
+def content():
+    return os.urandom(5 * 1000 + 7)
+
+
+@pytest.fixture
+async def server(tmp_path, content):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(content)
+
+    async def ranged(request):
+        return web.FileResponse(path)
+
+    async def plain(request):
+        return web.Response(body=content)
+
+    async def unknown_size(request):
+        if request.http_range.start is None:
+            return web.Response(body=content)
+        headers = {"Content-Range": "bytes 0-999/*"}
+        return web.Response(status=206, body=content[:1000], headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/ranged", ranged)
+    app.router.add_get("/plain", plain)
+    app.router.add_get("/unknown-size", unknown_size)
+    async with TestServer(app) as server:
+        yield server
+
+
+def test_split_ranges():
+    assert downloads.split_ranges(10, 3, 1) == [(0, 3), (4, 7), (8, 9)]
+    assert downloads.split_ranges(10, 3, 6) == [(0, 9)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/ranged", "/plain"])
+async def test_download(server, content, path):
+    async with ClientSession() as session:
+        data = await downloads.download(
+            session, str(server.make_url(path)), connections=4, min_part_size=1000
+        )
+
+    assert data == content
+
+
+@pytest.mark.asyncio
+async def test_download_of_unknown_size(server, content):
+    async with ClientSession() as session:
+        data = await downloads.download(
+            session, str(server.make_url("/unknown-size")), min_part_size=1000
+        )
+
+    assert data == content
+
+
+class SlowRanges:
+    """Serve ranges of `content` slowly, failing the range starting at
+    `fail_at`"""
+
+    def __init__(self, content: bytes, fail_at: int):
+        self.content = content
+        self.fail_at = fail_at
+
+    @asynccontextmanager
+    async def request(self, method, url, headers):
+        start, end = map(int, headers["Range"][len("bytes=") :].split("-"))
+        if start == self.fail_at:
+            raise ClientConnectionError()
+        end = min(end, len(self.content) - 1)
+
+        async def iter_chunked(size):
+            for offset in range(start, end + 1, 100):
+                await asyncio.sleep(0.01)
+                yield self.content[offset : min(offset + 100, end + 1)]
+
+        yield SimpleNamespace(
+            status=206,
+            headers={"Content-Range": f"bytes {start}-{end}/{len(self.content)}"},
+            raise_for_status=lambda: None,
+            content=SimpleNamespace(iter_chunked=iter_chunked),
+        )
+
+
+@pytest.mark.asyncio
+async def test_failed_range_cancels_the_others(content):
+    class Sink(io.BytesIO):
+        late_writes = 0
+
+        def seek(self, offset):
+            if self.closed:
+                Sink.late_writes += 1
+                return offset
+            return super().seek(offset)
+
+        def write(self, chunk):
+            if self.closed:
+                return len(chunk)
+            return super().write(chunk)
+
+    with Sink() as sink:
+        with pytest.raises(ClientConnectionError):
+            await downloads.download(SlowRanges(content, 1000), "", sink, 4, 1000)
+    await asyncio.sleep(0.1)
+
+    assert Sink.late_writes == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/ranged", "/plain"])
+async def test_download_to_file(server, content, path, tmp_path):
+    async with ClientSession() as session:
+        with open(tmp_path / "out.mp4", "wb") as f:
+            size = await downloads.download(
+                session, str(server.make_url(path)), f, min_part_size=1000
+            )
+
+    assert size == len(content)
+    assert (tmp_path / "out.mp4").read_bytes() == content
+
+
+@pytest.mark.parametrize("encode", [bytes.hex, lambda d: base64.b64encode(d).decode()])
+def test_sha256_matches(content, encode):
+    digest = hashlib.sha256(content).digest()
+    assert downloads.sha256_matches(digest, encode(digest))
+    assert not downloads.sha256_matches(digest, encode(b"\0" * 32))
+
+
+@pytest.mark.asyncio
+async def test_download_incoming_verifies_sha256(server, content):
+    media = incoming.Media(
+        id="1", mime_type="video/mp4", sha256=hashlib.sha256(content).hexdigest()
+    )
+    async with ClientSession() as session:
+        url = str(server.make_url("/plain"))
+        downloaded = await downloads.download_incoming(session, url, media)
+        assert downloaded.data == content
+        assert downloaded.size == len(content)
+        assert downloaded.mime_type == "video/mp4"
+
+        media.sha256 = hashlib.sha256(b"other").hexdigest()
+        with pytest.raises(errors.MediaIntegrityError):
+            await downloads.download_incoming(session, url, media)
+
+
+def media_update(content: dict, sha256: dict) -> incoming.WebhookUpdate:
+    return incoming.WebhookUpdate(
+        messages=[
+            {
+                "id": f"wamid.{media_id}",
+                "timestamp": "1703415322",
+                "from": "972500000001",
+                "type": "document",
+                "document": {
+                    "id": media_id,
+                    "mime_type": "application/pdf",
+                    "sha256": sha256.get(media_id, hashlib.sha256(data).hexdigest()),
+                },
+            }
+            for media_id, data in content.items()
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_download_many(make_client):
+    content = {f"doc-{i}": os.urandom(1000 + i) for i in range(3)}
+    sinks = {}
+
+    def sink_factory(message, media):
+        sinks[media.id] = io.BytesIO()
+        return sinks[media.id]
+
+    async with make_client(media=content) as client:
+        results = await client.download_many(
+            media_update(content, {}), sink_factory, concurrency=2
+        )
+
+    assert sorted(results) == [f"wamid.doc-{i}" for i in range(3)]
+    for media_id, data in content.items():
+        assert results[f"wamid.{media_id}"].size == len(data)
+        assert sinks[media_id].getvalue() == data
+
+
+@pytest.mark.asyncio
+async def test_download_many_fails_on_sha256_mismatch(make_client):
+    content = {f"doc-{i}": os.urandom(1000 + i) for i in range(3)}
+    update = media_update(content, {"doc-1": hashlib.sha256(b"other").hexdigest()})
+    async with make_client(media=content) as client:
+        with pytest.raises(errors.MediaIntegrityError):
+            await client.download_many(update)
+
+        # with verification off the content is taken as is
+        results = await client.download_many(update, verify=False)
+    assert results["wamid.doc-1"].data == content["doc-1"]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientResponseError
+
+from whatsapp import errors, messages
+from whatsapp.breaker import CircuitBreaker, CircuitState
+from whatsapp.concurrency import AdaptiveLimiter
+from whatsapp.expiry import ExpiryPolicy
+
+
+def text(body: str, ttl=None) -> messages.Message:
+    return messages.Message(
+        to="972500000001",
+        type=messages.MessageType.TEXT,
+        text=messages.Text(body=body),
+        ttl=ttl,
+    )
+
+
+@pytest.mark.asyncio
+async def test_messages_expire_while_waiting_for_a_slot(make_client):
+    dead_letters = []
+    client = make_client(
+        latency=0.1,
+        limiter=AdaptiveLimiter(initial=1, max_limit=1),
+        expiry=ExpiryPolicy(dead_letter=dead_letters.append),
+    )
+    async with client:
+        slow, expired, fresh = await asyncio.gather(
+            client.send(data=text("slow")),
+            client.send(data=text("otp", ttl={"seconds": 0.05})),
+            client.send(data=text("report", ttl={"minutes": 5})),
+            return_exceptions=True,
+        )
+
+    assert isinstance(expired, errors.MessageExpiredError)
+    assert slow.success and fresh.success
+    assert [m.text.body for m in dead_letters] == ["otp"]
+    assert client.expiry.expired == 1
+    assert client.transport.count == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_probes_do_not_close_the_circuit(make_client):
+    def unavailable(request):
+        return 503, "unavailable"
+
+    client = make_client(
+        {("POST", "/messages"): unavailable},
+        circuit_breaker=CircuitBreaker(failure_threshold=1, recovery_timeout=0),
+        limiter=AdaptiveLimiter(initial=1, max_limit=1),
+        expiry=ExpiryPolicy(),
+    )
+    async with client:
+        with pytest.raises(ClientResponseError):
+            await client.send(data=text("first"))
+        assert client.circuit_state() == CircuitState.HALF_OPEN
+
+        async with client.limiter.slot():
+            with pytest.raises(errors.MessageExpiredError):
+                await client.send(data=text("probe", ttl={"seconds": 0.05}))
+
+        assert client.circuit_state() == CircuitState.HALF_OPEN
+        assert client.transport.count == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from whatsapp import messages, responses
+from whatsapp.fanout import fan_out
+
+GROUPS = responses.GroupsResponse(
+    success=True,
+    data=[
+        responses.Group(
+            id=f"group-{i}",
+            name=f"Group {i}",
+            owner="972500000000",
+            admins=["972500000000"],
+            members=["972500000000"] + [f"9725000001{n:02}" for n in range(5)],
+            created="2023-01-01",
+        )
+        for i in range(3)
+    ],
+)
+
+
+@pytest.fixture
+async def client(make_client):
+    async with make_client({("GET", "/groups"): GROUPS}) as client:
+        yield client
+
+
+def sent(client):
+    return [
+        (request.json["to"], request.json.get("participants"))
+        for request in client.transport.requests
+        if request.method == "POST"
+    ]
+
+
+@pytest.fixture
+def message():
+    return messages.Message(
+        to="", type=messages.MessageType.TEXT, text=messages.Text(body="Meeting at 10")
+    )
+
+
+@pytest.mark.asyncio
+async def test_fan_out_to_groups(client, message):
+    stats = await fan_out(client, message, ["group-0", "group-2", "missing"])
+
+    assert (stats.messages, stats.sent, stats.failed) == (2, 2, 0)
+    assert sorted(sent(client)) == [("group-0", None), ("group-2", None)]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_chunks_participants(client, message):
+    stats = await fan_out(
+        client,
+        message,
+        ["group-1"],
+        audience="members",
+        participants=[
+            "+972500000100",
+            "972-500-000-101",
+            "972500000102",
+            "972599999999",
+        ],
+        chunk_size=2,
+    )
+
+    assert stats.sent == 2
+    assert sorted(sent(client)) == [
+        ("group-1", ["972500000100", "972500000101"]),
+        ("group-1", ["972500000102"]),
+    ]
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from whatsapp.hedging import HedgePolicy
+
+
+def slow_then_fast(delays):
+    delays = iter(delays)
+
+    async def request():
+        delay = next(delays)
+        await asyncio.sleep(delay)
+        return delay
+
+    return request
+
+
+@pytest.mark.asyncio
+async def test_fast_requests_are_not_hedged():
+    policy = HedgePolicy(delay=0.05)
+
+    assert await policy.run(slow_then_fast([0])) == 0
+    assert (policy.requests, policy.hedged) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_over_slow_request():
+    policy = HedgePolicy(delay=0.01)
+
+    assert await policy.run(slow_then_fast([10, 0])) == 0
+    assert (policy.hedged, policy.hedge_wins) == (1, 1)
+    assert policy.hedge_win_rate == 1.0
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_waits_for_primary():
+    policy = HedgePolicy(delay=0.01)
+    calls = []
+
+    async def request():
+        calls.append(None)
+        if len(calls) == 2:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(0.05)
+        return "primary"
+
+    assert await policy.run(request) == "primary"
+    assert policy.hedge_wins == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_cancels_requests():
+    policy = HedgePolicy(delay=10)
+    cancelled = []
+
+    async def request():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(None)
+            raise
+
+    caller = asyncio.ensure_future(policy.run(request))
+    await asyncio.sleep(0.01)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.sleep(0)
+    assert cancelled == [None]
+
+
+@pytest.mark.asyncio
+async def test_lost_requests_are_sampled():
+    policy = HedgePolicy(delay=0.02)
+
+    await policy.run(slow_then_fast([10, 0.02]))
+    await asyncio.sleep(0)
+    # the winner, and the loser cancelled after about 0.04s
+    assert len(policy._latencies) == 2
+    assert max(policy._latencies) >= 0.04
+
+
+def test_delay_follows_latency_percentile():
+    policy = HedgePolicy(percentile=0.9, min_samples=10, max_delay=5)
+    assert policy.hedge_delay == 5
+
+    policy._latencies.extend(i / 100 for i in range(1, 101))
+    assert policy.hedge_delay == pytest.approx(0.91)
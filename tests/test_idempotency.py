@@ -0,0 +1,93 @@
+import asyncio
+from functools import partial
+import json
+
+import pytest
+
+from whatsapp import messages
+from whatsapp.idempotency import MessageIds, retry_policy
+from whatsapp.transport import FakeTransport
+
+
+@pytest.fixture
+def client(make_client):
+    return partial(
+        make_client,
+        message_ids=MessageIds(),
+        retry_policy=retry_policy(base_delay=0.01),
+    )
+
+
+def text(body: str) -> messages.Message:
+    return messages.Message(
+        to="972500000001", type=messages.MessageType.TEXT, text=messages.Text(body=body)
+    )
+
+
+def test_ids_are_unique():
+    ids = MessageIds(max_size=2)
+    first = ids.acquire()
+    assert first.startswith("3EB0") and len(first) == 22
+    assert ids.acquire() != first
+
+    ids.acquire()
+    assert len(ids) == 2
+    ids.release(first)
+    assert len(ids) == 2
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_retried_with_the_same_id(client):
+    attempts = []
+
+    def flaky(request):
+        attempts.append(request.json["id"])
+        if len(attempts) < 3:
+            return 503, "unavailable"
+        return {"success": True}
+
+    async with client({("POST", "/messages"): flaky}) as c:
+        assert (await c.send_text("972500000001", "hi")).success
+
+    assert len(attempts) == 3 and len(set(attempts)) == 1
+
+
+@pytest.mark.asyncio
+async def test_every_send_gets_a_new_id(client):
+    transport = FakeTransport()
+    message = text("ok")
+    async with client(transport=transport) as c:
+        await asyncio.gather(c.send(data=message), c.send(data=message))
+        await c.send(data=message)
+        assert len(c.message_ids) == 0
+
+    ids = [request.json["id"] for request in transport.requests]
+    assert len(set(ids)) == 3
+    assert message.id is None
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_gives_a_deterministic_id(client):
+    attempts = []
+
+    def flaky(request):
+        body = request.json or json.loads(request.data)
+        attempts.append(body["id"])
+        if len(attempts) == 1:
+            return 503, "unavailable"
+        return {"success": True}
+
+    transport = FakeTransport({("POST", "/messages"): flaky})
+    async with client(transport=transport) as c:
+        await c.send(data=text("ok"), idempotency_key="order-1")
+        await c.send_payload(
+            text("ok").json(exclude={"id", "preview_url"}),
+            to="972500000001",
+            idempotency_key="order-1",
+        )
+        await c.send(data=text("ok"), idempotency_key="order-2")
+        assert len(c.message_ids) == 0
+
+    assert attempts[:3] == [MessageIds().derive("order-1")] * 3
+    assert attempts[3] == MessageIds().derive("order-2") != attempts[0]
+    assert attempts[0].startswith("3EB0") and len(attempts[0]) == 22
@@ -0,0 +1,47 @@
+import pytest
+
+from whatsapp import phones
+
+
+@pytest.mark.parametrize(
+    "number, expected",
+    [
+        ("+972 (50) 123-4567", "972501234567"),
+        ("00972-50-1234567", "972501234567"),
+        ("050.123.4567", "972501234567"),
+        ("٠٥٠١٢٣٤٥٦٧", "972501234567"),
+        ("972501234567", "972501234567"),
+        ("+0501234567", None),
+        ("000972501234567", None),
+        ("97250+1234567", None),
+        ("12345", None),
+        ("not a number", None),
+    ],
+)
+def test_normalize(number, expected):
+    assert phones.normalize(number, "+972") == expected
+
+
+def test_normalize_requires_country_code_for_national_numbers():
+    assert phones.normalize("050-1234567") is None
+
+
+def test_normalize_many():
+    numbers = ["050-1234567", "bad", "+972 50 123 4567", "line\nbreak 0501234568"]
+    assert phones.normalize_many(numbers, "972") == ["972501234567", "972501234568"]
+    assert phones.normalize_many(numbers, "972", dedup=False) == [
+        "972501234567",
+        "972501234567",
+        "972501234568",
+    ]
+
+
+def test_normalize_each(monkeypatch):
+    monkeypatch.setattr(phones, "BATCH_SIZE", 2)
+    numbers = ["050-1234567", "bad", "+972 50 123 4567", "line\nbreak 0501234568"]
+    assert phones.normalize_each(numbers, "+972") == [
+        "972501234567",
+        None,
+        "972501234567",
+        "972501234568",
+    ]
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from whatsapp import downloads, incoming
+from whatsapp.prefetch import MediaPrefetcher
+
+CONTENT = {"image-1": b"\xff\xd8" + b"1" * 5000, "voice-1": b"OggS" + b"2" * 100}
+
+
+def update(*media_ids: str) -> incoming.WebhookUpdate:
+    return incoming.WebhookUpdate(
+        messages=[
+            {
+                "id": f"wamid.{media_id}",
+                "timestamp": "1703415322",
+                "from": "972500000001",
+                "type": media_id.split("-")[0],
+                media_id.split("-")[0]: {
+                    "id": media_id,
+                    "mime_type": "application/octet-stream",
+                    "sha256": hashlib.sha256(CONTENT[media_id]).hexdigest(),
+                },
+            }
+            for media_id in media_ids
+        ]
+    )
+
+
+@pytest.fixture
+async def client(make_client):
+    async with make_client(media=CONTENT) as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_handlers_get_prefetched_media(client):
+    prefetcher = MediaPrefetcher(client, spool_size=1000)
+    received = []
+
+    async def handler(update):
+        for message in update.messages:
+            media = await prefetcher.get(message)
+            # spooled files only get a name once spilled to disk
+            spilled = media.file.name is not None
+            received.append((media.info.id, media.read(), spilled))
+            media.close()
+
+    await prefetcher.wrap(handler)(update("image-1", "voice-1"))
+
+    assert received == [
+        ("image-1", CONTENT["image-1"], True),
+        ("voice-1", CONTENT["voice-1"], False),
+    ]
+    assert (prefetcher.hits, prefetcher.misses) == (2, 0)
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_media_are_bounded(client):
+    prefetcher = MediaPrefetcher(client, max_pending=1)
+    assert prefetcher.prefetch(update("image-1", "voice-1")) == 2
+    assert prefetcher.dropped == 1
+
+    media = await prefetcher.get(update("image-1").messages[0].media())
+    assert media.read() == CONTENT["image-1"]
+    assert prefetcher.misses == 1
+    media.close()
+    await prefetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_media_of_discarded_downloads_is_closed():
+    class Client:
+        """Finishes its downloads even when cancelled"""
+
+        sinks = []
+
+        async def download(self, media, sink, verify):
+            self.sinks.append(sink)
+            try:
+                await asyncio.sleep(0.01)
+            except asyncio.CancelledError:
+                pass
+            return downloads.DownloadedMedia(media.id, media.mime_type, "", 0)
+
+    prefetcher = MediaPrefetcher(Client(), max_pending=1)
+    prefetcher.prefetch(update("image-1"))
+    await asyncio.sleep(0)
+    prefetcher.prefetch(update("voice-1"))
+    await asyncio.sleep(0.05)
+
+    assert prefetcher.dropped == 1
+    assert [sink.closed for sink in Client.sinks] == [True, False]
+    await prefetcher.close()
+    assert Client.sinks[1].closed
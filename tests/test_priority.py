@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from whatsapp.concurrency import AdaptiveLimiter
+from whatsapp.priority import Priority, PriorityScheduler
+
+
+@pytest.mark.asyncio
+async def test_reserved_capacity_is_kept_for_high_priority():
+    scheduler = PriorityScheduler(capacity=2, reserved=1)
+
+    async with scheduler.slot(Priority.BULK):
+        bulk = asyncio.ensure_future(scheduler._acquire(Priority.BULK))
+        await asyncio.sleep(0)
+        assert not bulk.done()
+
+        async with scheduler.slot(Priority.HIGH):
+            assert scheduler.in_flight == 2
+
+    await bulk
+    scheduler._release()
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_lanes_are_served_by_weight():
+    scheduler = PriorityScheduler(
+        capacity=2, reserved=1, weights={Priority.NORMAL: 3, Priority.BULK: 1}
+    )
+    order = []
+
+    async def send(priority):
+        async with scheduler.slot(priority):
+            order.append(priority)
+            await asyncio.sleep(0)
+
+    async with scheduler.slot(Priority.NORMAL):
+        tasks = [
+            asyncio.ensure_future(send(priority))
+            for priority in [Priority.BULK] * 4 + [Priority.NORMAL] * 4
+        ]
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    assert order[:4].count(Priority.NORMAL) == 3
+
+
+@pytest.mark.asyncio
+async def test_high_priority_sends_skip_the_limiter_queue(make_client):
+    client = make_client(
+        latency=0.01,
+        priorities=PriorityScheduler(),
+        limiter=AdaptiveLimiter(initial=1, max_limit=1),
+    )
+    async with client:
+        bulk = [
+            asyncio.ensure_future(
+                client.send_text("972500000001", f"bulk {i}", priority=Priority.BULK)
+            )
+            for i in range(4)
+        ]
+        await asyncio.sleep(0)
+        await client.send_buttons(
+            "972500000002", "otp", [("1", "ok")], priority=Priority.HIGH
+        )
+        await asyncio.gather(*bulk)
+
+    recipients = [request.json["to"] for request in client.transport.requests]
+    assert recipients.index("972500000002") <= 1
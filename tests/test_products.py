@@ -0,0 +1,123 @@
+from contextlib import asynccontextmanager
+import asyncio
+
+import pytest
+
+from whatsapp import errors
+from whatsapp._models.interactive import ProductItem, ProductListAction, ProductSection
+from whatsapp.transport import FakeTransport
+
+
+def section(title: str, count: int) -> ProductSection:
+    return ProductSection(
+        title=title,
+        product_items=[
+            ProductItem(product_retailer_id=f"{title}-{i}") for i in range(count)
+        ],
+    )
+
+
+def layout(actions):
+    return [
+        [(s.title, len(s.product_items)) for s in action.sections] for action in actions
+    ]
+
+
+def test_split_product_sections():
+    assert layout(ProductListAction.split("catalog", [section("all", 75)])) == [
+        [("all", 30)],
+        [("all", 30)],
+        [("all", 15)],
+    ]
+    sections = [section(f"s{i}", 2) for i in range(12)]
+    assert layout(ProductListAction.split("catalog", sections)) == [
+        [(f"s{i}", 2) for i in range(10)],
+        [("s10", 2), ("s11", 2)],
+    ]
+    sections = [section("shoes", 20), section("bags", 20)]
+    assert layout(ProductListAction.split("catalog", sections)) == [
+        [("shoes", 20), ("bags", 10)],
+        [("bags", 10)],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_send_product_lists(make_client):
+    async with make_client() as client:
+        results = await client.send_product_lists(
+            "972500000001",
+            "Our catalog",
+            "New arrivals",
+            "catalog",
+            [f"sku-{i}" for i in range(65)],
+        )
+
+    assert len(results) == 3
+    first_items = [
+        request.json["interactive"]["action"]["sections"][0]["product_items"][0]
+        for request in client.transport.requests
+    ]
+    assert first_items == [{"product_retailer_id": f"sku-{i}"} for i in (0, 30, 60)]
+
+
+@pytest.mark.asyncio
+async def test_send_product_lists_stops_at_first_failure(make_client):
+    def reply(request):
+        if len(transport.requests) == 2:
+            return 400, {"success": False, "message": "Bad Request"}
+        return {"messages": [{"id": f"wamid.{len(transport.requests)}"}]}
+
+    transport = FakeTransport({("POST", r"/messages"): reply})
+    async with make_client(transport=transport) as client:
+        with pytest.raises(errors.RequestError):
+            await client.send_product_lists(
+                "972500000001",
+                "Our catalog",
+                "New arrivals",
+                "catalog",
+                [f"sku-{i}" for i in range(90)],
+            )
+
+    assert len(transport.requests) == 2
+
+
+def first_retailer_id(json) -> str:
+    section = json["interactive"]["action"]["sections"][0]
+    return section["product_items"][0]["product_retailer_id"]
+
+
+class SlowTransport(FakeTransport):
+    """Reject the first product list at once, answer the others late"""
+
+    def __init__(self):
+        super().__init__({("POST", r"/messages"): self._reply})
+
+    def _reply(self, request):
+        if first_retailer_id(request.json) == "sku-0":
+            return 400, {"success": False, "message": "Bad Request"}
+        return self._send(request)
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        if first_retailer_id(kwargs["json"]) != "sku-0":
+            await asyncio.sleep(0.05)
+        async with super().request(method, url, **kwargs) as response:
+            yield response
+
+
+@pytest.mark.asyncio
+async def test_send_product_lists_cancels_in_flight_on_failure(make_client):
+    transport = SlowTransport()
+    async with make_client(transport=transport) as client:
+        with pytest.raises(errors.RequestError):
+            await client.send_product_lists(
+                "972500000001",
+                "Our catalog",
+                "New arrivals",
+                "catalog",
+                [f"sku-{i}" for i in range(90)],
+                concurrency=3,
+            )
+        await asyncio.sleep(0.1)
+
+    assert len(transport.requests) == 1
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from whatsapp.receipts import ReadMarkCoalescer
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def send(sent):
+    async def send(message_id):
+        sent.append(message_id)
+        return message_id
+
+    return send
+
+
+@pytest.mark.asyncio
+async def test_only_latest_read_mark_is_sent(sent, send):
+    coalescer = ReadMarkCoalescer(window=0.01)
+
+    results = await asyncio.gather(
+        coalescer.mark("chat-1", "m1", send),
+        coalescer.mark("chat-1", "m2", send),
+        coalescer.mark("chat-2", "m3", send),
+        coalescer.mark("chat-1", "m4", send),
+    )
+
+    assert sorted(sent) == ["m3", "m4"]
+    assert results == ["m4", "m4", "m3", "m4"]
+    assert coalescer.sent == 2
+    assert coalescer.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_flush_sends_pending_read_marks(sent, send):
+    coalescer = ReadMarkCoalescer(window=60)
+
+    pending = asyncio.ensure_future(coalescer.mark("chat-1", "m1", send))
+    await asyncio.sleep(0)
+    await coalescer.flush()
+
+    assert await pending == "m1"
+    assert sent == ["m1"]
+
+
+@pytest.mark.asyncio
+async def test_older_read_marks_do_not_replace_newer_ones(sent, send):
+    coalescer = ReadMarkCoalescer(window=0.01)
+
+    await asyncio.gather(
+        coalescer.mark("chat-1", "m2", send, "1703415388"),
+        coalescer.mark("chat-1", "m1", send, "1703415322"),
+    )
+
+    assert sent == ["m2"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_send_cancels_waiting_callers():
+    coalescer = ReadMarkCoalescer(window=60)
+
+    async def send(message_id):
+        await asyncio.sleep(60)
+
+    pending = asyncio.ensure_future(coalescer.mark("chat-1", "m1", send))
+    await asyncio.sleep(0)
+    flush = asyncio.ensure_future(coalescer.flush())
+    await asyncio.sleep(0)
+    flush.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(pending, 1)
@@ -0,0 +1,48 @@
+import pytest
+
+from whatsapp import errors, incoming
+from whatsapp.recipients import RecipientCache
+
+
+def test_recipient_cache_marks_recipient_errors(tmp_path):
+    path = str(tmp_path / "recipients.sqlite")
+    cache = RecipientCache(path=path)
+
+    assert not cache.mark("972500000001", 130429)
+    assert cache.mark("+972500000002", 131026)
+    cache.record_status(
+        incoming.Status(
+            id="wamid.1",
+            recipient_id="972500000003",
+            status="failed",
+            timestamp="1703415322",
+            errors=[{"code": 131026, "title": "Message undeliverable"}],
+        )
+    )
+    cache.close()
+
+    cache = RecipientCache(path=path)
+    assert cache.error_code("972500000001") is None
+    assert cache.error_code("972500000002") == 131026
+    with pytest.raises(errors.UndeliverableRecipientError):
+        cache.check("+972500000003")
+    assert cache.skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_send_skips_undeliverable_recipients(make_client):
+    error = {
+        "message": "Message undeliverable",
+        "type": "OAuthException",
+        "code": 131026,
+    }
+    async with make_client(
+        {("POST", "/messages"): (400, {"success": False, "error": error})},
+        recipients=RecipientCache(),
+    ) as client:
+        with pytest.raises(errors.CloudAPIError):
+            await client.send_text("972500000001", "hi")
+        with pytest.raises(errors.UndeliverableRecipientError):
+            await client.send_text("972500000001", "hi")
+
+    assert client.transport.count == 1
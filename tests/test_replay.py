@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from whatsapp import incoming
+from whatsapp.replay import read_updates, replay
+
+
+@pytest.fixture
+def path(tmp_path):
+    update = {
+        "contacts": [{"profile": {"name": "Test"}, "wa_id": "972543089167"}],
+        "messages": [
+            {
+                "id": "wamid.1",
+                "timestamp": "1703415322",
+                "from": "972543089167",
+                "type": "text",
+                "text": {"body": "Hello"},
+            }
+        ],
+    }
+    path = tmp_path / "updates.ndjson"
+    path.write_text("\n".join([json.dumps(update)] * 3 + ["", "not json"]))
+    return str(path)
+
+
+def test_read_updates(path):
+    updates = list(read_updates(path))
+
+    assert len(updates) == 3
+    assert isinstance(updates[0], incoming.MessageUpdate)
+    assert list(read_updates(path, fast=True))[0]["messages"][0]["id"] == "wamid.1"
+
+
+@pytest.mark.asyncio
+async def test_replay(path):
+    handled = []
+
+    async def handler(update):
+        handled.append(update)
+
+    stats = await replay(path, handler, rate=1000, concurrency=2)
+
+    assert len(handled) == stats.updates == 3
+    assert stats.parse_errors == 1
+    assert stats.handler_errors == 0
+    assert stats.rate > 0
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from whatsapp import messages
+from whatsapp.scheduler import SendScheduler
+
+
+def text(to: str, body: str) -> messages.Message:
+    return messages.Message(
+        to=to, type=messages.MessageType.TEXT, text=messages.Text(body=body)
+    )
+
+
+@pytest.fixture
+async def client(make_client):
+    async with make_client() as client:
+        yield client
+
+
+def sent_bodies(client):
+    return [request.json["text"]["body"] for request in client.transport.requests]
+
+
+@pytest.mark.asyncio
+async def test_due_messages_are_released_in_order(client):
+    scheduler = SendScheduler(client, batch_size=2, concurrency=1)
+    now = time.time()
+    scheduler.schedule(text("972500000001", "second"), now - 1)
+    scheduler.schedule(text("972500000001", "first"), now - 2)
+    scheduler.schedule(text("972500000001", "third"), now - 1)
+    scheduler.schedule(text("972500000001", "later"), now + 60)
+    cancelled = scheduler.schedule(text("972500000001", "cancelled"), now - 1)
+    assert scheduler.cancel(cancelled)
+    assert scheduler.pending == 4
+
+    assert await scheduler.release_due() == 2
+    assert await scheduler.release_due() == 2
+    assert await scheduler.release_due() == 0
+
+    assert sent_bodies(client) == ["first", "second", "third"]
+    assert (scheduler.sent, scheduler.pending) == (3, 1)
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduled_messages_are_persisted(client, tmp_path):
+    path = str(tmp_path / "scheduled.sqlite")
+    scheduler = SendScheduler(client, path=path)
+    scheduler.schedule_in(text("972500000001", "reminder"), 0.05)
+    await scheduler.close()
+
+    async with SendScheduler(client, path=path, max_sleep=0.01) as scheduler:
+        assert scheduler.pending == 1
+        scheduler.schedule_in(text("972500000001", "next"), 0.06)
+        await asyncio.sleep(0.2)
+
+    assert sent_bodies(client) == ["reminder", "next"]
+    assert SendScheduler(client, path=path).pending == 0
+
+
+@pytest.mark.asyncio
+async def test_interrupted_batch_keeps_only_unsent_messages(tmp_path, make_client):
+    path = str(tmp_path / "scheduled.sqlite")
+    async with make_client(latency=0.05) as client:
+        scheduler = SendScheduler(client, path=path, concurrency=1)
+        ids = [
+            scheduler.schedule(text("972500000001", body), time.time() - 1)
+            for body in ["first", "second", "third"]
+        ]
+        release = asyncio.ensure_future(scheduler.release_due())
+        await asyncio.sleep(0.07)
+        assert not scheduler.cancel(ids[2])
+
+        release.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await release
+        await scheduler.close()
+
+    assert scheduler.sent == 1
+    assert SendScheduler(client, path=path).pending == 2
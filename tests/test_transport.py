@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientConnectionError, ClientResponseError, ContentTypeError, web
+from aiohttp.test_utils import TestServer
+
+from whatsapp import WhatsAppClient, WhatsAppConfig, downloads, errors, responses
+from whatsapp.transport import HttpxTransport
+
+
+@pytest.fixture
+async def server():
+    async def echo(request):
+        return web.json_response(
+            {
+                "body": await request.text(),
+                "token": request.headers.get("Authorization"),
+                "query": dict(request.query),
+            }
+        )
+
+    async def missing(request):
+        return web.Response(status=404, text="not found")
+
+    async def slow(request):
+        await asyncio.sleep(1)
+        return web.Response()
+
+    async def media(request):
+        return web.Response(body=b"x" * 3000)
+
+    async def status(request):
+        return web.json_response({"success": True, "message": "connected"})
+
+    app = web.Application()
+    app.router.add_post("/echo", echo)
+    app.router.add_get("/missing", missing)
+    app.router.add_get("/slow", slow)
+    app.router.add_get("/media", media)
+    app.router.add_get("/status", status)
+    app.router.add_post("/form", echo)
+    async with TestServer(app) as server:
+        yield server
+
+
+@pytest.fixture
+async def transport():
+    pytest.importorskip("httpx")
+    transport = HttpxTransport(http2=False, timeout=0.5)
+    yield transport
+    await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_request(server, transport):
+    transport.headers.update({"Authorization": "Bearer token"})
+    url = str(server.make_url("/echo"))
+    async with transport.request(
+        "POST", url, data='{"a": 1}', params={"q": "1"}
+    ) as resp:
+        assert resp.status == 200
+        assert await resp.json() == {
+            "body": '{"a": 1}',
+            "token": "Bearer token",
+            "query": {"q": "1"},
+        }
+
+
+@pytest.mark.asyncio
+async def test_errors(server, transport):
+    async with transport.request("GET", str(server.make_url("/missing"))) as resp:
+        with pytest.raises(ContentTypeError):
+            await resp.json()
+        assert await resp.text() == "not found"
+        with pytest.raises(ClientResponseError) as e:
+            resp.raise_for_status()
+        assert e.value.status == 404
+
+    with pytest.raises(asyncio.TimeoutError):
+        async with transport.request("GET", str(server.make_url("/slow"))):
+            pass
+
+    with pytest.raises(ClientConnectionError):
+        async with transport.request("GET", "http://127.0.0.1:1/"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_download(server, transport):
+    data = await downloads.download(
+        transport, str(server.make_url("/media")), connections=1
+    )
+    assert data == b"x" * 3000
+
+
+@pytest.mark.asyncio
+async def test_client_requests(server, transport):
+    config = WhatsAppConfig(endpoint=str(server.make_url("")).rstrip("/"))
+    async with WhatsAppClient(config, transport=transport) as client:
+        resp = await client.status()
+        assert isinstance(resp, responses.StatusResponse)
+        assert resp.success
+
+        async with transport.request(
+            "POST", str(server.make_url("/form")), data={"a": "1"}
+        ) as resp:
+            assert (await resp.json())["body"] == "a=1"
+
+
+@pytest.fixture
+async def fake_client(make_client):
+    async with make_client() as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_fake_send(fake_client):
+    resp = await fake_client.send_text("+972500000001", "hi")
+    assert resp.success
+
+    request = fake_client.transport.requests[-1]
+    assert request.url == "http://fake/messages"
+    assert request.json["text"] == {"body": "hi"}
+    assert request.headers["X-Wa-Id"] == "972500000000"
+
+
+@pytest.mark.asyncio
+async def test_fake_media(fake_client):
+    uploaded = await fake_client.upload(b"content", "image/png")
+    assert await fake_client.download_media(uploaded.media_id) == b"content"
+
+    media = await fake_client.get_media(uploaded.media_id)
+    assert media.file_size == "7"
+    with pytest.raises(ClientResponseError):
+        await fake_client.get_media("missing")
+
+
+@pytest.mark.asyncio
+async def test_fake_routes(fake_client):
+    error = {
+        "success": False,
+        "error": {"message": "Throttled", "type": "OAuthException", "code": 130429},
+    }
+    fake_client.transport.route("POST", "/messages", (429, error))
+    assert isinstance(await fake_client.groups(), responses.GroupsResponse)
+    with pytest.raises(errors.CloudAPIError):
+        await fake_client.send_text("972500000001", "hi")
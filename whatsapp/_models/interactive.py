@@ -157,10 +157,46 @@ class ProductAction(Action):
     product_retailer_id: str
 
 
+# limits of one product list message
+MAX_PRODUCT_SECTIONS = 10
+MAX_PRODUCTS = 30
+
+
 class ProductListAction(Action):
     catalog_id: str
     sections: conlist(ProductSection, min_items=1)
 
+    @classmethod
+    def split(
+        cls,
+        catalog_id: str,
+        sections: List[ProductSection],
+        max_sections: int = MAX_PRODUCT_SECTIONS,
+        max_products: int = MAX_PRODUCTS,
+    ) -> List["ProductListAction"]:
+        """Split sections into as few actions within the limits of one message
+        as possible, keeping the order. Sections that do not fit are continued
+        in the next action, under the same title."""
+        actions = []
+        current: List[ProductSection] = []
+        count = 0
+        for section in sections:
+            items = section.product_items
+            while items:
+                if count == max_products or len(current) == max_sections:
+                    actions.append(cls(catalog_id=catalog_id, sections=current))
+                    current, count = [], 0
+                part, items = (
+                    items[: max_products - count],
+                    items[max_products - count :],
+                )
+                current.append(section.copy(update={"product_items": part}))
+                count += len(part)
+
+        if current:
+            actions.append(cls(catalog_id=catalog_id, sections=current))
+        return actions
+
 
 class CatalogMessageAction(Action):
     name: str = "catalog_message"
@@ -0,0 +1,118 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import Enum
+import time
+from typing import Dict
+
+from aiohttp import ClientConnectionError
+from loguru import logger
+
+from whatsapp import errors
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class _Circuit:
+    state: CircuitState = CircuitState.CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    probes: int = 0
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream keeps failing.
+
+    A circuit opens after `failure_threshold` consecutive failures (connection
+    errors, timeouts and 5xx responses) and rejects requests with
+    `errors.CircuitOpenError` for `recovery_timeout` seconds. It then half-opens
+    and lets `half_open_probes` requests through: a successful probe closes the
+    circuit, a failed one opens it again. Circuits are kept per key.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self._circuits: Dict[str, _Circuit] = {}
+
+    @staticmethod
+    def is_failure(error: BaseException) -> bool:
+        if isinstance(error, (asyncio.TimeoutError, ClientConnectionError)):
+            return True
+        status = getattr(error, "status", None)
+        return isinstance(status, int) and status >= 500
+
+    def state(self, key: str) -> CircuitState:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            return CircuitState.CLOSED
+        if (
+            circuit.state == CircuitState.OPEN
+            and time.monotonic() - circuit.opened_at >= self.recovery_timeout
+        ):
+            circuit.state = CircuitState.HALF_OPEN
+            circuit.probes = 0
+        return circuit.state
+
+    def _acquire(self, key: str) -> _Circuit:
+        state = self.state(key)
+        circuit = self._circuits.setdefault(key, _Circuit())
+        if state == CircuitState.HALF_OPEN:
+            if circuit.probes >= self.half_open_probes:
+                raise errors.CircuitOpenError(key, 0.0)
+            circuit.probes += 1
+        elif state == CircuitState.OPEN:
+            retry_after = self.recovery_timeout - (time.monotonic() - circuit.opened_at)
+            raise errors.CircuitOpenError(key, retry_after)
+        return circuit
+
+    def _open(self, key: str, circuit: _Circuit):
+        logger.bind(key=key, failures=circuit.failures).warning("Circuit opened")
+        circuit.state = CircuitState.OPEN
+        circuit.opened_at = time.monotonic()
+
+    def _close(self, key: str, circuit: _Circuit):
+        if circuit.state != CircuitState.CLOSED:
+            logger.bind(key=key).info("Circuit closed")
+        circuit.state = CircuitState.CLOSED
+        circuit.failures = 0
+
+    @asynccontextmanager
+    async def guard(self, key: str):
+        """Run a request through the circuit of `key`"""
+        circuit = self._acquire(key)
+        probe = circuit.state == CircuitState.HALF_OPEN
+        try:
+            yield
+        except (
+            asyncio.CancelledError,
+            errors.CircuitOpenError,
+            errors.MessageExpiredError,
+        ):
+            # the upstream did not answer, nor fail
+            raise
+        except Exception as e:
+            if not self.is_failure(e):
+                # the upstream answered, even if with an error
+                self._close(key, circuit)
+            else:
+                circuit.failures += 1
+                if probe or circuit.failures >= self.failure_threshold:
+                    self._open(key, circuit)
+            raise
+        else:
+            self._close(key, circuit)
+        finally:
+            if probe:
+                circuit.probes -= 1
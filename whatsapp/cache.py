@@ -0,0 +1,127 @@
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+class ExpiringCache:
+    """A key -> value mapping with expiring entries.
+
+    Entries live in memory and, when `path` is given, are also written through
+    to a local sqlite database so they survive restarts. Values must be json
+    serializable. With `preload`, the stored entries are all loaded up front
+    and lookups never query the database.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        path: Optional[str] = None,
+        table: str = "cache",
+        preload: bool = False,
+    ):
+        self.ttl = ttl
+        self.table = table
+        self.preload = preload
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            with self._db:
+                self._db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+                )
+                self._db.execute(
+                    f"DELETE FROM {table} WHERE expires_at <= ?", (time.time(),)
+                )
+            if preload:
+                for key, value, expires_at in self._db.execute(
+                    f"SELECT key, value, expires_at FROM {table}"
+                ):
+                    self._entries[key] = (json.loads(value), expires_at)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None and not self.preload:
+            row = self._db.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                entry = self._entries[key] = (json.loads(row[0]), row[1])
+
+        if entry is None:
+            return default
+        if entry[1] <= time.time():
+            self.delete(key)
+            return default
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        if self._db is not None:
+            with self._db:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        """Set many entries, in one database transaction"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        for key, value in items.items():
+            self._entries[key] = (value, expires_at)
+        if self._db is not None:
+            with self._db:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                    [
+                        (key, json.dumps(value), expires_at)
+                        for key, value in items.items()
+                    ],
+                )
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            with self._db:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class UploadCache(ExpiringCache):
+    """Uploaded media ids keyed by the endpoint and account they were uploaded
+    to, and the sha256 of their content and mime type."""
+
+    def __init__(
+        self, ttl: float = 24 * 60 * 60, path: Optional[str] = None, table="uploads"
+    ):
+        super().__init__(ttl, path, table)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data: bytes, mime_type: str, endpoint: str, account: str) -> str:
+        # media ids are only valid for the account that uploaded them
+        return f"{endpoint}/{account}:{hashlib.sha256(data).hexdigest()}:{mime_type}"
+
+    def media_id(self, key: str) -> Optional[str]:
+        media_id = self.get(key)
+        if media_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            logger.debug(f"Reusing uploaded media {media_id} for {key}")
+        return media_id
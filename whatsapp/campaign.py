@@ -0,0 +1,158 @@
+import asyncio
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+import json
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from loguru import logger
+
+from whatsapp import errors, messages, phones
+from whatsapp._models.template import Template
+from whatsapp.priority import Priority
+
+# slots are delimited with private use code points, that never occur in
+# template values, unlike `{{1}}` style placeholders
+_SLOT_START, _SLOT_END = "\ue000", "\ue001"
+_SLOT = re.compile(f"{_SLOT_START}(\\w+){_SLOT_END}")
+
+
+def slot(field: str) -> str:
+    """A slot of a template value, filled with the `field` of each row"""
+    return f"{_SLOT_START}{field}{_SLOT_END}"
+
+
+@dataclass
+class CampaignStats:
+    rows: int = 0
+    sent: int = 0
+    failed: int = 0
+    # known undeliverable recipients
+    skipped: int = 0
+    elapsed: float = 0.0
+    # row number -> error
+    errors: Dict[int, Exception] = field(default_factory=dict, repr=False)
+
+    @property
+    def rate(self) -> float:
+        """Rows processed per second"""
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def read_csv(path: str, **fmtparams) -> Iterator[Dict[str, str]]:
+    """Lazily read campaign rows from a csv file with a header line"""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f, **fmtparams)
+
+
+class TemplateCampaign:
+    """Send one template to many recipients.
+
+    String values of `template` may contain `slot(field)` slots, e.g. a
+    text parameter `slot("name")` or a currency `amount_1000` of
+    `slot("amount")`. The message is validated and serialized once; rendering
+    a row only puts its json escaped values into the serialized skeleton. The
+    recipient is taken from the `to_field` column and normalized, national
+    numbers default to `country_code`. Messages are sent with `ttl`, see
+    `ExpiryPolicy`.
+    """
+
+    def __init__(
+        self,
+        template: Template,
+        to_field: str = "to",
+        country_code: Optional[str] = None,
+        ttl: Optional[Dict[str, Any]] = None,
+    ):
+        message = messages.Message(
+            to=slot(to_field),
+            type=messages.MessageType.TEMPLATE,
+            template=template,
+            ttl=ttl,
+        )
+        self.template = template
+        self.to_field = to_field
+        self.country_code = country_code
+        self.ttl = ttl
+        self._parts: List[str] = _SLOT.split(
+            message.json(exclude_none=True, ensure_ascii=False)
+        )
+        self.fields = set(self._parts[1::2])
+
+    def render(self, row: Mapping[str, Any]) -> str:
+        """The message body for `row`"""
+        parts = self._parts
+        rendered = [parts[0]]
+        for i in range(1, len(parts), 2):
+            if (value := row.get(parts[i])) is None:
+                raise ValueError(f"Missing campaign field {parts[i]!r}")
+            rendered.append(json.dumps(str(value))[1:-1])
+            rendered.append(parts[i + 1])
+        return "".join(rendered)
+
+    async def run(
+        self,
+        client,
+        rows: Iterable[Mapping[str, Any]],
+        concurrency: int = 10,
+        priority: Priority = Priority.BULK,
+    ) -> CampaignStats:
+        """Send the template to every row, with up to `concurrency` sends in
+        flight. Failed rows are logged and counted, they do not stop the run.
+        Recipients in the client's `recipients` cache are skipped."""
+        stats = CampaignStats()
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        def fail(number: int, error: Exception):
+            stats.failed += 1
+            stats.errors[number] = error
+            logger.bind(error=error).warning(f"Campaign row {number} failed")
+
+        async def send(number: int, payload: str, to: str):
+            try:
+                await client.send_payload(
+                    payload, priority=priority, to=to, ttl=self.ttl
+                )
+                stats.sent += 1
+            except errors.UndeliverableRecipientError:
+                stats.skipped += 1
+            except Exception as e:
+                fail(number, e)
+            finally:
+                semaphore.release()
+
+        start = time.perf_counter()
+        for number, row, to in self._recipients(rows):
+            stats.rows += 1
+            try:
+                if to is None:
+                    raise ValueError(f"Invalid phone number {row.get(self.to_field)!r}")
+                payload = self.render({**row, self.to_field: to})
+            except ValueError as e:
+                fail(number, e)
+                continue
+            await semaphore.acquire()
+            task = asyncio.ensure_future(send(number, payload, to))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _recipients(
+        self, rows: Iterable[Mapping[str, Any]]
+    ) -> Iterator[Tuple[int, Mapping[str, Any], Optional[str]]]:
+        """Number the rows and normalize their recipients, a chunk at a time"""
+        rows = iter(rows)
+        number = 0
+        while chunk := list(islice(rows, phones.BATCH_SIZE)):
+            recipients = phones.normalize_each(
+                (row.get(self.to_field) or "" for row in chunk), self.country_code
+            )
+            for row, to in zip(chunk, recipients):
+                number += 1
+                yield number, row, to
@@ -1,19 +1,50 @@
+from contextlib import AsyncExitStack, asynccontextmanager
 from dataclasses import field, dataclass
+from functools import partial
+import asyncio
+import hashlib
 import io
 from json import JSONDecodeError
 import json
-from typing import Any, Dict, List, Literal, Tuple, Union, Optional, TYPE_CHECKING
+import mimetypes
+import time
+from urllib.parse import urlsplit
+from typing import (
+    Any,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Tuple,
+    Union,
+    Optional,
+    TYPE_CHECKING,
+)
 
+from aioretry import RetryInfo, RetryPolicy, retry
 from aiohttp import ClientSession, FormData, MultipartWriter
 from aiohttp.client_exceptions import ContentTypeError
 from loguru import logger
 from pydantic import BaseModel, ValidationError
 
-from whatsapp import errors, messages, responses
+from whatsapp import downloads, errors, incoming, messages, responses
 from whatsapp._models.interactive import Header, HeaderTypes
 from whatsapp._models.media import Media, MediaTypes
 
+from .breaker import CircuitBreaker, CircuitState
+from .cache import UploadCache
+from .coalescing import TextCoalescer
+from .concurrency import AdaptiveLimiter
 from .config import WhatsAppConfig
+from .expiry import ExpiryPolicy
+from .hedging import HedgePolicy
+from .idempotency import MessageIds
+from .priority import Priority, PriorityScheduler
+from .receipts import ReadMarkCoalescer
+from .recipients import RecipientCache
+from .transport import AiohttpTransport, Transport
 from .utils import needs_login
 
 if TYPE_CHECKING:
@@ -24,9 +55,26 @@ if TYPE_CHECKING:
 class Client:
     config: WhatsAppConfig = field(default_factory=WhatsAppConfig)
     session: ClientSession = field(default_factory=ClientSession)
+    read_marks: Optional[ReadMarkCoalescer] = None
+    upload_cache: Optional[UploadCache] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    hedging: Optional[HedgePolicy] = None
+    limiter: Optional[AdaptiveLimiter] = None
+    priorities: Optional[PriorityScheduler] = None
+    text_coalescer: Optional[TextCoalescer] = None
+    recipients: Optional[RecipientCache] = None
+    expiry: Optional[ExpiryPolicy] = None
+    message_ids: Optional[MessageIds] = None
+    retry_policy: Optional[RetryPolicy] = None
+    transport: Optional[Transport] = None
+    _uploads: Dict[str, "asyncio.Future[responses.UploadResponse]"] = field(
+        default_factory=dict, init=False, repr=False
+    )
 
     def __post_init__(self):
-        self.session.headers.update(
+        if self.transport is None:
+            self.transport = AiohttpTransport(self.session)
+        self.transport.headers.update(
             {
                 "User-Agent": self.config.user_agent,
                 "X-Wa-Id": self.config.wa_id or "",
@@ -41,20 +89,127 @@ class Client:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.read_marks is not None:
+            await self.read_marks.flush()
+        if self.text_coalescer is not None:
+            await self.text_coalescer.flush()
+        await self.transport.close()
         await self.session.__aexit__(exc_type, exc_val, exc_tb)
 
+    def _account(self) -> str:
+        """The configured account, or a digest of the token without one"""
+        account = self.config.wa_id
+        if account is None and self.config.token:
+            account = hashlib.sha256(self.config.token.encode()).hexdigest()[:12]
+        return account or ""
+
+    def _circuit_key(self, url: str) -> str:
+        """Circuits are kept per endpoint host and account"""
+        return f"{urlsplit(url).netloc}/{self._account()}"
+
+    def circuit_state(self, url: Optional[str] = None) -> Optional[CircuitState]:
+        """State of the circuit of `url` (default: the configured endpoint)"""
+        if self.circuit_breaker is None:
+            return None
+        return self.circuit_breaker.state(
+            self._circuit_key(url or self.config.endpoint)
+        )
+
+    @asynccontextmanager
+    async def _limited(self, priority: Optional[Priority] = None):
+        """Hold a slot of the adaptive limiter, if any"""
+        if self.limiter is None:
+            yield
+        else:
+            async with self.limiter.slot(priority):
+                yield
+
     async def _do_request(
-        self, method, url, response_model: BaseModel = None, **kwargs
+        self,
+        method,
+        url,
+        response_model: BaseModel = None,
+        *,
+        hedge=False,
+        limited=False,
+        priority: Optional[Priority] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
     ) -> Union[BaseModel, Dict, str, None]:
         if data := kwargs.pop("data", {}):
             # TODO: use custom json encoder
             if isinstance(data, BaseModel):
                 kwargs["json"] = json.loads(data.json(exclude_none=True))
                 data = None
+            elif isinstance(data, messages.SerializedMessage):
+                data = data.json()
+                kwargs["headers"] = {
+                    "Content-Type": "application/json",
+                    **(kwargs.get("headers") or {}),
+                }
 
         logger.debug(f"{method} {url} {list(kwargs.keys()) if kwargs else ''}")
 
-        async with self.session.request(method, url, **kwargs, data=data) as resp:
+        request = partial(
+            self._guarded_request,
+            method,
+            url,
+            response_model,
+            data,
+            limited=limited,
+            priority=priority,
+            deadline=deadline,
+            **kwargs,
+        )
+        if hedge and self.hedging is not None:
+            return await self.hedging.run(request)
+        return await request()
+
+    async def _guarded_request(
+        self,
+        method,
+        url,
+        response_model: BaseModel,
+        data,
+        *,
+        limited=False,
+        priority: Optional[Priority] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> Union[BaseModel, Dict, str, None]:
+        async with AsyncExitStack() as stack:
+            if priority is not None and self.priorities is not None:
+                await self._before(
+                    deadline, stack.enter_async_context(self.priorities.slot(priority))
+                )
+            if limited:
+                await self._before(
+                    deadline, stack.enter_async_context(self._limited(priority))
+                )
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise errors.MessageExpiredError(f"Deadline of {method} {url} passed")
+            # only entered once the request is about to reach the upstream
+            if self.circuit_breaker is not None:
+                await stack.enter_async_context(
+                    self.circuit_breaker.guard(self._circuit_key(url))
+                )
+            return await self._request(method, url, response_model, data, **kwargs)
+
+    @staticmethod
+    async def _before(deadline: Optional[float], aw: Awaitable):
+        """Wait for `aw` until `deadline`"""
+        if deadline is None:
+            return await aw
+        try:
+            return await asyncio.wait_for(aw, max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise errors.MessageExpiredError("Deadline passed while waiting") from None
+
+    async def _request(
+        self, method, url, response_model: BaseModel, data, **kwargs
+    ) -> Union[BaseModel, Dict, str, None]:
+        async with self.transport.request(method, url, **kwargs, data=data) as resp:
             model_resp: BaseModel = None
 
             try:
@@ -164,6 +319,7 @@ class Client:
             "GET",
             f"{self.config.endpoint}/status",
             response_model=responses.StatusResponse,
+            hedge=True,
         )
         return resp
 
@@ -223,6 +379,7 @@ class Client:
             "GET",
             f"{self.config.endpoint}/profile/privacy",
             response_model=responses.PrivacyResponse,
+            hedge=True,
         )
         return resp
 
@@ -247,27 +404,89 @@ class Client:
 
     @needs_login
     async def upload(self, data: bytes, mime_type: str) -> responses.UploadResponse:
-        resp: responses.UploadResponse = await self._do_request(
-            "POST",
-            f"{self.config.endpoint}/media",
-            data=data,
-            response_model=responses.UploadResponse,
-            headers={"Content-Type": mime_type},
+        return await self._upload(
+            self._upload_key(data, mime_type),
+            partial(
+                self._do_request,
+                "POST",
+                f"{self.config.endpoint}/media",
+                data=data,
+                response_model=responses.UploadResponse,
+                headers={"Content-Type": mime_type},
+                limited=True,
+            ),
         )
-        return resp
 
     @needs_login
     async def upload_file(self, data: bytes, mime_type: str) -> responses.UploadedMedia:
         form: FormData = FormData()
         form.add_field("file", data, content_type=mime_type)
 
-        resp: responses.UploadResponse = await self._do_request(
-            "POST",
-            f"{self.config.endpoint}/media?messaging_product=whatsapp",
-            data=form,
-            response_model=responses.UploadResponse,
+        return await self._upload(
+            self._upload_key(data, mime_type),
+            partial(
+                self._do_request,
+                "POST",
+                f"{self.config.endpoint}/media?messaging_product=whatsapp",
+                data=form,
+                response_model=responses.UploadResponse,
+                limited=True,
+            ),
         )
-        return resp
+
+    @needs_login
+    async def upload_path(
+        self, path: str, mime_type: Optional[str] = None
+    ) -> responses.UploadResponse:
+        """Upload a local file, reusing a cached upload of the same content"""
+        mime_type = mime_type or mimetypes.guess_type(path)[0]
+        with open(path, "rb") as f:
+            return await self.upload(f.read(), mime_type)
+
+    async def _upload(
+        self,
+        key: Optional[str],
+        request: Callable[[], Awaitable[responses.UploadResponse]],
+    ) -> responses.UploadResponse:
+        """Run the upload `request`, unless the content of `key` was uploaded
+        already or is being uploaded"""
+        if key is None:
+            return await request()
+        if cached := self._cached_upload(key):
+            return cached
+
+        if (upload := self._uploads.get(key)) is None:
+
+            async def run():
+                try:
+                    resp = await request()
+                    self._remember_upload(key, resp)
+                    return resp
+                finally:
+                    del self._uploads[key]
+
+            upload = self._uploads[key] = asyncio.ensure_future(run())
+        # a cancelled caller does not cancel the upload of the others
+        return await asyncio.shield(upload)
+
+    def _upload_key(self, data: bytes, mime_type: str) -> Optional[str]:
+        if self.upload_cache is None:
+            return None
+        return self.upload_cache.key(
+            data, mime_type, self.config.endpoint, self._account()
+        )
+
+    def _cached_upload(self, key: Optional[str]) -> Optional[responses.UploadResponse]:
+        if key is None or not (media_id := self.upload_cache.media_id(key)):
+            return None
+        return responses.UploadResponse(
+            success=True, media=[responses.UploadedMedia(id=media_id)]
+        )
+
+    def _remember_upload(self, key: Optional[str], resp: responses.UploadResponse):
+        if key is not None and isinstance(resp, responses.UploadResponse):
+            if resp.media_id:
+                self.upload_cache.set(key, resp.media_id)
 
     @needs_login
     async def delete_message(
@@ -282,19 +501,135 @@ class Client:
         )
 
     @needs_login
-    async def send(self, *args, **kwargs) -> responses.AnyResponse:
+    async def send(
+        self, *args, priority: Priority = Priority.NORMAL, **kwargs
+    ) -> responses.AnyResponse:
+        """Send a message.
+
+        With `priorities` set, the message waits in the lane of `priority`.
+        With `text_coalescer` set, texts may be merged with the following texts
+        of the same priority to the same recipient, high priority texts are
+        sent right away.
+        With `recipients` set, recipients known to be undeliverable raise
+        `UndeliverableRecipientError` without a request.
+        With `expiry` set, messages whose ttl runs out before they are sent
+        raise `MessageExpiredError`.
+        With `message_ids` set, messages without an id get a new one for
+        this call, and messages with an id are retried according to
+        `retry_policy`.
+        With an `idempotency_key`, messages without an id get the id derived
+        from the key instead, so sending again with the same key is dropped
+        by the server as a duplicate; such messages are not coalesced.
+        """
         data = kwargs.pop("data", None)
-        if isinstance(data, messages.Message) and data.preview_url is None:
+        is_message = isinstance(data, (messages.Message, messages.SerializedMessage))
+        if is_message and data.preview_url is None:
             data.preview_url = self.config.defaults.preview_url
 
-        return await self._do_request(
+        if self.recipients is not None and is_message and data.to is not None:
+            self.recipients.check(data.to)
+        if self.expiry is not None and is_message:
+            kwargs["deadline"] = self.expiry.deadline(data)
+
+        if self.text_coalescer is not None and is_message and data.to is not None:
+            if (
+                isinstance(data, messages.Message)
+                and self.text_coalescer.accepts(data)
+                and priority != Priority.HIGH
+                and kwargs.get("idempotency_key") is None
+            ):
+                return await self.text_coalescer.submit(
+                    data,
+                    lambda message: self._send(
+                        message, *args, priority=priority, **kwargs
+                    ),
+                    priority,
+                )
+            await self.text_coalescer.flush(data.to)
+
+        return await self._send(data, *args, priority=priority, **kwargs)
+
+    async def _send(
+        self,
+        data,
+        *args,
+        priority: Priority,
+        idempotency_key: Optional[str] = None,
+        **kwargs,
+    ):
+        is_message = isinstance(data, (messages.Message, messages.SerializedMessage))
+        to = data.to if is_message else None
+        id = None
+        if idempotency_key is not None and is_message and data.id is None:
+            # the same for every send with this key, not acquired
+            ids = self.message_ids if self.message_ids is not None else MessageIds()
+            data = data.copy(update={"id": ids.derive(idempotency_key)})
+        elif self.message_ids is not None and is_message and data.id is None:
+            # kept across the retries of this call only, `data` is left as is
+            id = self.message_ids.acquire()
+            data = data.copy(update={"id": id})
+
+        request = partial(
+            self._do_request,
             "POST",
             f"{self.config.endpoint}/messages",
             *args,
             data=data,
             response_model=responses.ApiResponse,
+            limited=True,
+            priority=priority,
             **kwargs,
         )
+        try:
+            if self.retry_policy is not None and is_message and data.id is not None:
+                # the server drops duplicates of an id, retrying is safe
+                policy = self._retry_policy(kwargs.get("deadline"))
+                return await retry(policy)(request)()
+            return await request()
+        except errors.CloudAPIError as e:
+            if self.recipients is not None and to is not None:
+                self.recipients.record_error(to, e)
+            raise
+        except errors.MessageExpiredError:
+            if self.expiry is not None and is_message:
+                await self.expiry.expire(data)
+            raise
+        finally:
+            if id is not None:
+                self.message_ids.release(id)
+
+    def _retry_policy(self, deadline: Optional[float]) -> RetryPolicy:
+        """`retry_policy`, giving up on retries that would end after `deadline`"""
+
+        def policy(info: RetryInfo):
+            abandon, delay = self.retry_policy(info)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                return True, 0
+            return abandon, delay
+
+        return policy
+
+    @needs_login
+    async def send_payload(
+        self,
+        payload: Union[str, bytes],
+        priority: Priority = Priority.NORMAL,
+        to: Optional[str] = None,
+        ttl: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> responses.AnyResponse:
+        """Send an already serialized message body, as `send` does.
+
+        `to` and `ttl` are those of the message, its `id` and `preview_url`
+        must be left out of `payload`, they are added as for other messages.
+        """
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        return await self.send(
+            data=messages.SerializedMessage(payload, to, ttl),
+            priority=priority,
+            idempotency_key=idempotency_key,
+        )
 
     async def send_text(self, to: str, text: str, *args, **kwargs):
         message = messages.Message(
@@ -313,6 +648,7 @@ class Client:
         buttons: List[Tuple[str, str]],
         header: Optional["Header"] = None,
         footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
     ):
         message = messages.Message(
             to=to,
@@ -334,7 +670,7 @@ class Client:
                 ),
             ),
         )
-        return await self.send(data=message)
+        return await self.send(data=message, priority=priority)
 
     async def send_list(
         self,
@@ -345,6 +681,7 @@ class Client:
         button: str = None,
         header: Optional["Header"] = None,
         footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
     ):
         button = button or title
 
@@ -373,7 +710,7 @@ class Client:
                 ),
             ),
         )
-        return await self.send(data=message)
+        return await self.send(data=message, priority=priority)
 
     async def send_flow(
         self,
@@ -388,6 +725,7 @@ class Client:
         payload_data: Optional[Dict[str, Any]] = None,
         header: Optional["Header"] = None,
         footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
     ):
         parameters_kwargs = {}
         if token:
@@ -416,7 +754,7 @@ class Client:
                 ),
             ),
         )
-        return await self.send(data=message)
+        return await self.send(data=message, priority=priority)
 
     async def send_catalog(
         self,
@@ -425,6 +763,7 @@ class Client:
         product_retailer_id: str,
         header: Optional["Header"] = None,
         footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
     ):
         message = messages.Message(
             to=to,
@@ -438,7 +777,7 @@ class Client:
                 ),
             ),
         )
-        return await self.send(data=message)
+        return await self.send(data=message, priority=priority)
 
     async def send_product(
         self,
@@ -448,6 +787,7 @@ class Client:
         product_retailer_id: str,
         header: Optional["Header"] = None,
         footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
     ):
         message = messages.Message(
             to=to,
@@ -462,7 +802,7 @@ class Client:
                 ),
             ),
         )
-        return await self.send(data=message)
+        return await self.send(data=message, priority=priority)
 
     async def send_product_list(
         self,
@@ -472,7 +812,58 @@ class Client:
         catalog_id: str,
         product_items: List[str],
         footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
     ):
+        action = messages.interactive.ProductListAction(
+            catalog_id=catalog_id,
+            sections=self._product_sections(product_items),
+        )
+        message = self._product_list_message(to, text, header, action, footer)
+        return await self.send(data=message, priority=priority)
+
+    async def send_product_lists(
+        self,
+        to: str,
+        text: str,
+        header: str,
+        catalog_id: str,
+        product_items: List[str],
+        footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
+        concurrency: int = 1,
+    ) -> List[responses.AnyResponse]:
+        """Send any number of products, split into as many product lists as
+        the limits of a message require.
+
+        Messages are sent one after the other, so that they arrive in order;
+        with a `concurrency` above one they are sent that many at a time and
+        may arrive out of order. Responses are returned in order. The first
+        failure stops the sending: later messages are not sent, and with
+        concurrency those in flight are cancelled.
+        """
+        actions = messages.interactive.ProductListAction.split(
+            catalog_id, self._product_sections(product_items)
+        )
+
+        async def send(action: messages.interactive.ProductListAction):
+            return await self.send(
+                data=self._product_list_message(to, text, header, action, footer),
+                priority=priority,
+            )
+
+        if concurrency <= 1:
+            return [await send(action) for action in actions]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send_limited(action: messages.interactive.ProductListAction):
+            async with semaphore:
+                return await send(action)
+
+        return await downloads._gather(*(send_limited(action) for action in actions))
+
+    @staticmethod
+    def _product_sections(product_items) -> List[messages.interactive.ProductSection]:
         # check if product_items is a list of strings
         if len(product_items) > 0 and isinstance(product_items[0], str):
             sections = [
@@ -495,13 +886,17 @@ class Client:
 
         if len(sections) == 0:
             raise ValueError("product_items must not be empty")
+        return sections
 
-        action = messages.interactive.ProductListAction(
-            catalog_id=catalog_id,
-            sections=sections,
-        )
-
-        message = messages.Message(
+    @staticmethod
+    def _product_list_message(
+        to: str,
+        text: str,
+        header: str,
+        action: messages.interactive.ProductListAction,
+        footer: Optional["Text"] = None,
+    ) -> messages.Message:
+        return messages.Message(
             to=to,
             type=messages.MessageType.INTERACTIVE,
             interactive=messages.interactive.InteractiveProductList(
@@ -514,7 +909,6 @@ class Client:
                 action=action,
             ),
         )
-        return await self.send(data=message)
 
     async def send_url(
         self,
@@ -524,6 +918,7 @@ class Client:
         title: str,
         header: Optional["Header"] = None,
         footer: Optional["Text"] = None,
+        priority: Priority = Priority.NORMAL,
     ):
         action = messages.interactive.UrlAction.from_url(url, title)
         message = messages.Message(
@@ -536,11 +931,26 @@ class Client:
                 action=action,
             ),
         )
-        return await self.send(data=message)
+        return await self.send(data=message, priority=priority)
 
     async def send_media(
         self, to, type: str, media_id=None, media_link=None, *args, **kwargs
     ):
+        """Send media by id, link or local content.
+
+        Local content is given as `media_data` (with `mime_type`) or
+        `media_path`, and is uploaded first (once, when `upload_cache` is set).
+        """
+        media_data = kwargs.pop("media_data", None)
+        media_path = kwargs.pop("media_path", None)
+        mime_type = kwargs.pop("mime_type", None)
+        if media_path is not None:
+            media_id = (await self.upload_path(media_path, mime_type)).media_id
+        elif media_data is not None:
+            if mime_type is None:
+                raise ValueError("mime_type must be specified with media_data")
+            media_id = (await self.upload(media_data, mime_type)).media_id
+
         try:
             media = messages.Media.parse_obj(
                 {
@@ -577,7 +987,26 @@ class Client:
             *args, type="document", filename=filename, **kwargs
         )
 
-    async def send_read_mark(self, message_id):
+    async def send_read_mark(
+        self,
+        message_id,
+        chat_id: Optional[str] = None,
+        timestamp: Union[int, str, None] = None,
+    ):
+        """Mark a message (and every earlier message of its chat) as read.
+
+        When `read_marks` is set and `chat_id` is given, the read mark is
+        coalesced with the other read marks of the chat; give the message
+        `timestamp` of the webhook so that an older message marked late does
+        not replace a newer one.
+        """
+        if self.read_marks is not None and chat_id is not None:
+            return await self.read_marks.mark(
+                chat_id, message_id, self._send_read_mark, timestamp
+            )
+        return await self._send_read_mark(message_id)
+
+    async def _send_read_mark(self, message_id):
         return await self.send(
             data=messages.ReadMark(message_id=message_id),
         )
@@ -587,10 +1016,70 @@ class Client:
             "GET",
             f"{self.config.media_endpoint or self.config.endpoint}/{media_id}",
             response_model=responses.MediaResponse,
+            hedge=True,
+            limited=True,
         )
         return resp
 
-    async def download_media(self, media_id) -> bytes:
+    async def download_media(self, media_id, connections: int = 1) -> bytes:
+        """Download media content, over `connections` parallel range requests
+        when the media host supports them"""
         resp: responses.MediaResponse = await self.get_media(media_id)
-        async with self.session.request("GET", resp.url) as response:
-            return await response.read()
+        async with self._limited():
+            return await downloads.download(self.transport, resp.url, None, connections)
+
+    async def download_media_to(self, media_id, path: str, connections: int = 4) -> int:
+        """Download media content into a file, return its size"""
+        resp: responses.MediaResponse = await self.get_media(media_id)
+        with open(path, "wb") as f:
+            async with self._limited():
+                return await downloads.download(
+                    self.transport, resp.url, f, connections
+                )
+
+    async def download(
+        self,
+        media: incoming.Media,
+        sink: Optional[BinaryIO] = None,
+        verify: bool = True,
+    ) -> downloads.DownloadedMedia:
+        """Download incoming media using the metadata of the webhook.
+
+        Only the media url is looked up, the content is checked against the
+        webhook sha256 while streaming into `sink` (or into memory).
+        """
+        resp: responses.MediaResponse = await self.get_media(media.id)
+        async with self._limited():
+            return await downloads.download_incoming(
+                self.transport, resp.url, media, sink, verify
+            )
+
+    async def download_many(
+        self,
+        update: incoming.WebhookUpdate,
+        sink_factory: Optional[
+            Callable[[incoming.Message, incoming.Media], BinaryIO]
+        ] = None,
+        concurrency: int = 4,
+        verify: bool = True,
+    ) -> Dict[str, downloads.DownloadedMedia]:
+        """Download the media of all messages of an update, by message id.
+
+        `sink_factory` is called with the message and its media (and so its
+        mime type) before downloading; the sinks are not closed.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def download(message: incoming.Message, media: incoming.Media):
+            async with semaphore:
+                sink = sink_factory(message, media) if sink_factory else None
+                return message.id, await self.download(media, sink, verify)
+
+        results = await downloads._gather(
+            *(
+                download(message, media)
+                for message in update.messages or []
+                if (media := message.media()) is not None
+            )
+        )
+        return dict(results)
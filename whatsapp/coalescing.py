@@ -0,0 +1,123 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from whatsapp import messages
+from whatsapp.priority import Priority
+
+SendMessage = Callable[[messages.Message], Awaitable[Any]]
+
+
+@dataclass
+class _PendingText:
+    message: messages.Message
+    send: SendMessage
+    future: asyncio.Future
+    priority: Optional[Priority] = None
+    bodies: List[str] = field(default_factory=list)
+    length: int = 0
+    task: Optional[asyncio.Task] = None
+
+
+@dataclass
+class TextCoalescer:
+    """Merge consecutive text messages to the same recipient.
+
+    Texts sent to one recipient within `window` seconds of the first one are
+    joined with `separator` into a single message of at most `max_length`
+    characters. All merged callers share the response of that message.
+    Only texts of the same priority are merged. Replies, messages with an id
+    or a ttl and non text messages are never merged; sending one flushes the
+    pending texts of its recipient first, to keep the order.
+    """
+
+    window: float = 0.2
+    separator: str = "\n"
+    max_length: int = 4096
+    sent: int = 0
+    merged: int = 0
+
+    _pending: Dict[str, _PendingText] = field(default_factory=dict, repr=False)
+
+    @staticmethod
+    def accepts(message: messages.Message) -> bool:
+        return (
+            message.type == messages.MessageType.TEXT
+            and message.context is None
+            and message.id is None
+            and message.ttl is None
+        )
+
+    def _fits(
+        self,
+        pending: _PendingText,
+        message: messages.Message,
+        priority: Optional[Priority],
+    ) -> bool:
+        return (
+            pending.priority == priority
+            and pending.message.preview_url == message.preview_url
+            and pending.message.recipient_type == message.recipient_type
+            and pending.message.participants == message.participants
+            and pending.length + len(self.separator) + len(message.text.body)
+            <= self.max_length
+        )
+
+    async def submit(
+        self,
+        message: messages.Message,
+        send: SendMessage,
+        priority: Optional[Priority] = None,
+    ) -> Any:
+        pending = self._pending.get(message.to)
+        if pending is not None and not self._fits(pending, message, priority):
+            await self.flush(message.to)
+            pending = None
+
+        if pending is None:
+            pending = _PendingText(
+                message, send, asyncio.get_running_loop().create_future(), priority
+            )
+            pending.task = asyncio.create_task(self._send_later(message.to))
+            self._pending[message.to] = pending
+        else:
+            self.merged += 1
+            pending.length += len(self.separator)
+
+        pending.bodies.append(message.text.body)
+        pending.length += len(message.text.body)
+        return await asyncio.shield(pending.future)
+
+    async def flush(self, to: Optional[str] = None):
+        """Send the pending texts of `to` (default: of all recipients) now"""
+        for key in [to] if to is not None else list(self._pending):
+            pending = self._pending.get(key)
+            if pending is not None:
+                # texts are still pending only while their task sleeps
+                pending.task.cancel()
+                await self._send(key)
+
+    async def _send_later(self, to: str):
+        await asyncio.sleep(self.window)
+        await self._send(to)
+
+    async def _send(self, to: str):
+        pending = self._pending.pop(to)
+        message = pending.message
+        if len(pending.bodies) > 1:
+            logger.debug(f"Sending {len(pending.bodies)} texts to {to} as one message")
+            message = message.copy(
+                update={"text": messages.Text(body=self.separator.join(pending.bodies))}
+            )
+
+        self.sent += 1
+        try:
+            pending.future.set_result(await pending.send(message))
+        except Exception as e:
+            pending.future.set_exception(e)
+        finally:
+            if not pending.future.done():
+                # cancelled mid-send, the callers must not wait forever
+                pending.future.cancel()
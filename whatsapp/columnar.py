@@ -0,0 +1,214 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from whatsapp import incoming
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+MEDIA_FIELDS = ("image", "audio", "voice", "video", "document", "sticker")
+
+# column name -> type, every column is nullable
+TABLES: Dict[str, Dict[str, str]] = {
+    "messages": {
+        "id": "str",
+        "timestamp": "int",
+        "from": "str",
+        "type": "str",
+        "group_id": "str",
+        "context_id": "str",
+        "text": "str",
+        "media_id": "str",
+        "mime_type": "str",
+        "caption": "str",
+    },
+    "statuses": {
+        "id": "str",
+        "timestamp": "int",
+        "status": "str",
+        "recipient_id": "str",
+        "chat_id": "str",
+        "group_id": "str",
+        "conversation_id": "str",
+        "billable": "bool",
+        "pricing_model": "str",
+        "error_code": "int",
+    },
+}
+
+Column = List[Any]
+
+
+def _timestamp(value: Any) -> Optional[int]:
+    # unix time as a digit string, anything else is kept as null
+    if isinstance(value, int):
+        return value
+    return int(value) if isinstance(value, str) and value.isdigit() else None
+
+
+def _message_row(message: Dict[str, Any]) -> Tuple:
+    media = next((message[k] for k in MEDIA_FIELDS if message.get(k)), None) or {}
+    return (
+        message["id"],
+        _timestamp(message["timestamp"]),
+        message["from"],
+        message["type"],
+        message.get("group_id"),
+        (message.get("context") or {}).get("id"),
+        (message.get("text") or {}).get("body"),
+        media.get("id"),
+        media.get("mime_type"),
+        media.get("caption"),
+    )
+
+
+def _status_row(status: Dict[str, Any]) -> Tuple:
+    pricing = status.get("pricing") or {}
+    errors = status.get("errors")
+    return (
+        status["id"],
+        _timestamp(status["timestamp"]),
+        status["status"],
+        status.get("recipient_id"),
+        status.get("chat_id"),
+        (status.get("message") or {}).get("group_id"),
+        (status.get("conversation") or {}).get("id"),
+        pricing.get("billable"),
+        pricing.get("pricing_model"),
+        errors[0]["code"] if errors else None,
+    )
+
+
+def _empty_columns(table: str) -> List[Column]:
+    return [[] for _ in TABLES[table]]
+
+
+class ColumnarWriter:
+    """Write webhook updates into `directory` as messages and statuses tables.
+
+    Messages and statuses are flattened into column batches, one file per
+    table, which `scan` reads back without validating any model. The default
+    format is ndjson with one header line per batch followed by one line per
+    column, so that `scan` skips unprojected columns without parsing them.
+    The parquet format needs pyarrow. Existing ndjson files are appended to,
+    while existing parquet files are replaced, as parquet files cannot be
+    appended to.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 10_000, format="ndjson"):
+        if format == "parquet" and pyarrow is None:
+            raise ImportError(
+                "pyarrow is required for the parquet format, see the parquet extra"
+            )
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.format = format
+        self._columns = {table: _empty_columns(table) for table in TABLES}
+        self._files: Dict[str, Any] = {}
+
+    def write(self, update: Union[Dict[str, Any], incoming.WebhookUpdate]):
+        """Add an update, given as the raw webhook body or a parsed model"""
+        if isinstance(update, incoming.WebhookUpdate):
+            update = update.dict(by_alias=True)
+
+        for table, key, row in (
+            ("messages", "messages", _message_row),
+            ("statuses", "statuses", _status_row),
+        ):
+            columns = self._columns[table]
+            for record in update.get(key) or ():
+                for column, value in zip(columns, row(record)):
+                    column.append(value)
+            if len(columns[0]) >= self.batch_size:
+                self._write_batch(table)
+
+    def flush(self):
+        for table in TABLES:
+            if len(self._columns[table][0]):
+                self._write_batch(table)
+
+    def close(self):
+        self.flush()
+        for file in self._files.values():
+            file.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_batch(self, table: str):
+        columns = self._columns[table]
+        self._columns[table] = _empty_columns(table)
+
+        if self.format == "parquet":
+            self._write_parquet(table, columns)
+            return
+
+        file = self._files.get(table)
+        if file is None:
+            file = self._files[table] = open(
+                os.path.join(self.directory, f"{table}.ndjson"), "a"
+            )
+        header = {"table": table, "rows": len(columns[0]), "columns": TABLES[table]}
+        file.write(json.dumps(header) + "\n")
+        for column in columns:
+            file.write(json.dumps(column) + "\n")
+
+    def _write_parquet(self, table: str, columns: List[Column]):
+        types = {
+            "int": pyarrow.int64(),
+            "str": pyarrow.string(),
+            "bool": pyarrow.bool_(),
+        }
+        batch = pyarrow.record_batch(
+            [
+                pyarrow.array(c, types[t])
+                for c, t in zip(columns, TABLES[table].values())
+            ],
+            names=list(TABLES[table]),
+        )
+        writer = self._files.get(table)
+        if writer is None:
+            writer = self._files[table] = pyarrow.parquet.ParquetWriter(
+                os.path.join(self.directory, f"{table}.parquet"), batch.schema
+            )
+        writer.write_batch(batch)
+
+
+def scan(
+    directory: str,
+    table: str,
+    columns: Optional[Sequence[str]] = None,
+    format="ndjson",
+) -> Iterator[Dict[str, Column]]:
+    """Iterate over the batches of a table, with only the given `columns`"""
+    columns = list(columns or TABLES[table])
+
+    if format == "parquet":
+        if pyarrow is None:
+            raise ImportError(
+                "pyarrow is required for the parquet format, see the parquet extra"
+            )
+        file = pyarrow.parquet.ParquetFile(os.path.join(directory, f"{table}.parquet"))
+        for batch in file.iter_batches(columns=columns):
+            yield {name: batch.column(name).to_pylist() for name in columns}
+        return
+
+    with open(os.path.join(directory, f"{table}.ndjson")) as f:
+        while line := f.readline():
+            header = json.loads(line)
+            batch = {}
+            for name in header["columns"]:
+                line = f.readline()
+                if name in columns:
+                    batch[name] = json.loads(line)
+            yield {name: batch[name] for name in columns}
@@ -0,0 +1,123 @@
+from typing import Any, Dict, Optional, Union
+
+from pydantic import BaseModel
+
+from whatsapp import incoming
+
+PAYLOAD_FIELDS = (
+    "text",
+    "image",
+    "audio",
+    "voice",
+    "video",
+    "document",
+    "sticker",
+    "contacts",
+    "interactive",
+    "button",
+    "location",
+    "reaction",
+    "system",
+    "order",
+)
+
+
+class CompactMessage:
+    """A memory compact incoming message.
+
+    Keeps the common fields of `incoming.Message` in slots and only the
+    populated payload (`text`, `image`, ...) instead of every optional field,
+    taking roughly a third of the memory of the pydantic model (see
+    benchmarks/compact_messages.py). Timestamps are kept as ints. A message
+    with more than one payload keeps the others in `extra`.
+    """
+
+    __slots__ = (
+        "id",
+        "timestamp",
+        "from_",
+        "type",
+        "group_id",
+        "context",
+        "payload_field",
+        "payload",
+        "extra",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        timestamp: Union[int, str],
+        from_: str,
+        type: str,
+        group_id: Optional[str] = None,
+        context: Optional[incoming.Context] = None,
+        payload_field: Optional[str] = None,
+        payload: Optional[BaseModel] = None,
+        extra: Optional[Dict[str, BaseModel]] = None,
+    ):
+        self.id = id
+        self.timestamp = timestamp
+        self.from_ = from_
+        self.type = type
+        self.group_id = group_id
+        self.context = context
+        self.payload_field = payload_field
+        self.payload = payload
+        self.extra = extra
+
+    @classmethod
+    def from_message(cls, message: incoming.Message) -> "CompactMessage":
+        populated = [name for name in PAYLOAD_FIELDS if getattr(message, name)]
+        if message.type in populated:
+            payload_field = message.type
+        else:
+            # untagged payload, e.g. of an unknown message type
+            payload_field = populated[0] if populated else None
+        extra = {
+            name: getattr(message, name) for name in populated if name != payload_field
+        }
+
+        timestamp = message.timestamp
+        return cls(
+            message.id,
+            int(timestamp) if timestamp.isdigit() else timestamp,
+            message.from_,
+            message.type,
+            message.group_id,
+            message.context,
+            payload_field,
+            getattr(message, payload_field) if payload_field else None,
+            extra or None,
+        )
+
+    def to_message(self) -> incoming.Message:
+        fields: Dict[str, Any] = {
+            "id": self.id,
+            "timestamp": str(self.timestamp),
+            "from": self.from_,
+            "type": self.type,
+            "group_id": self.group_id,
+            "context": self.context,
+            **(self.extra or {}),
+        }
+        if self.payload_field is not None:
+            fields[self.payload_field] = self.payload
+        return incoming.Message.parse_obj(fields)
+
+    def media(self) -> Optional[incoming.Media]:
+        payloads = [self.payload, *(self.extra or {}).values()]
+        return next((p for p in payloads if isinstance(p, incoming.Media)), None)
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactMessage):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return (
+            f"CompactMessage(id={self.id!r}, type={self.type!r}, from_={self.from_!r})"
+        )
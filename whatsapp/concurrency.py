@@ -0,0 +1,115 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import time
+from typing import Deque, Dict, Optional
+
+from loguru import logger
+
+from whatsapp import errors
+from whatsapp.priority import Priority
+
+
+class AdaptiveLimiter:
+    """Limit in-flight requests with an adaptive (AIMD) limit.
+
+    Every successful request raises the limit by `increase / limit`, so about
+    `increase` per round of `limit` requests. A throttling error, or a latency
+    above `latency_target` when one is given, multiplies the limit by
+    `decrease`, at most once per round trip. The limit stays within
+    [min_limit, max_limit]. Freed slots go to the waiting requests of the
+    highest priority first.
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_target: Optional[float] = None,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+
+        self._limit = float(initial)
+        self._last_decrease = 0.0
+        self._waiters: Dict[Priority, Deque[asyncio.Future]] = {
+            priority: deque() for priority in Priority
+        }
+
+        self.in_flight = 0
+        self.throttled = 0
+
+    @property
+    def limit(self) -> int:
+        """The current limit of in-flight requests"""
+        return int(self._limit)
+
+    def _next_waiters(self) -> Optional[Deque[asyncio.Future]]:
+        return next((queue for queue in self._waiters.values() if queue), None)
+
+    async def _acquire(self, priority: Priority = Priority.NORMAL):
+        if self.in_flight >= self.limit or self._next_waiters() is not None:
+            waiter = asyncio.get_running_loop().create_future()
+            queue = self._waiters[priority]
+            queue.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # the slot was handed over already, pass it on
+                    self.in_flight -= 1
+                    self._wake()
+                elif waiter in queue:
+                    queue.remove(waiter)
+                raise
+        else:
+            self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self.in_flight < self.limit and (queue := self._next_waiters()):
+            waiter = queue.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _on_success(self, latency: float):
+        if self.latency_target is not None and latency > self.latency_target:
+            self._back_off(latency)
+        else:
+            self._limit = min(self._limit + self.increase / self._limit, self.max_limit)
+            self._wake()
+
+    def _back_off(self, latency: float):
+        now = time.monotonic()
+        if now - self._last_decrease < latency:
+            return  # requests of the same round trip
+        self._last_decrease = now
+        self._limit = max(self._limit * self.decrease, self.min_limit)
+        logger.debug(f"Concurrency limit decreased to {self.limit}")
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None):
+        """Hold one in-flight slot while running a request of `priority`"""
+        await self._acquire(Priority(priority or Priority.NORMAL))
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if errors.is_throttling(e):
+                self.throttled += 1
+                self._back_off(time.monotonic() - start)
+            raise
+        else:
+            self._on_success(time.monotonic() - start)
+        finally:
+            self._release()
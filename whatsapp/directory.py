@@ -0,0 +1,179 @@
+import asyncio
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+from loguru import logger
+
+from whatsapp import phones, responses
+from whatsapp.cache import ExpiringCache
+
+if TYPE_CHECKING:
+    from .client import Client
+
+
+class _Listing:
+    """One cached list and its index by id"""
+
+    def __init__(self, name: str, fetch: Callable[[], Awaitable[List[Any]]], key):
+        self.name = name
+        self.fetch = fetch
+        self.key = key
+        self.items: Optional[List[Any]] = None
+        self.by_id: Dict[str, Any] = {}
+        self.fetched_at = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def update(self, items: List[Any]):
+        self.by_id = {self.key(item): item for item in items}
+        self.items = items
+        self.fetched_at = time.monotonic()
+
+
+class Directory:
+    """Cached groups, contacts and newsletters of the account.
+
+    Each list is fetched once and served from memory with lookups by id. Once
+    older than `ttl` seconds it is still served while a single background
+    refresh fetches it again; concurrent callers share one in-flight fetch.
+    Answers of `reachable` are also kept in `reachability` when given, e.g. a
+    persistent `ExpiringCache` with a longer ttl.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        ttl: float = 300,
+        reachability: Optional[ExpiringCache] = None,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.reachability = reachability
+        self._groups = _Listing("groups", self._fetch_groups, lambda g: g.id)
+        self._contacts = _Listing("contacts", self._fetch_contacts, lambda c: str(c.id))
+        self._newsletters = _Listing(
+            "newsletters", self._fetch_newsletters, lambda n: n.id
+        )
+
+    async def _fetch_groups(self) -> List[responses.Group]:
+        return (await self.client.groups()).data or []
+
+    async def _fetch_contacts(self) -> List[responses.Contact]:
+        return (await self.client.contacts()).data or []
+
+    async def _fetch_newsletters(self) -> List[responses.Newsletter]:
+        return (await self.client.newsletters()).data or []
+
+    async def _load(self, listing: _Listing) -> _Listing:
+        if listing.items is None:
+            await self._refresh(listing)
+        elif time.monotonic() - listing.fetched_at > self.ttl:
+            self._refresh(listing)
+        return listing
+
+    def _refresh(self, listing: _Listing) -> asyncio.Task:
+        if listing.task is None or listing.task.done():
+            listing.task = asyncio.create_task(self._fetch(listing))
+            listing.task.add_done_callback(self._log_refresh_error)
+        return listing.task
+
+    async def _fetch(self, listing: _Listing):
+        logger.debug(f"Refreshing {listing.name} directory")
+        listing.update(await listing.fetch())
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.bind(error=task.exception()).warning("Failed to refresh directory")
+
+    async def refresh(self):
+        """Fetch all lists now"""
+        await asyncio.gather(
+            *(
+                self._refresh(listing)
+                for listing in (self._groups, self._contacts, self._newsletters)
+            )
+        )
+
+    def invalidate(self):
+        """Drop all cached lists"""
+        for listing in (self._groups, self._contacts, self._newsletters):
+            listing.items = None
+            listing.by_id = {}
+
+    async def groups(self) -> List[responses.Group]:
+        return (await self._load(self._groups)).items
+
+    async def group(self, group_id: str) -> Optional[responses.Group]:
+        return (await self._load(self._groups)).by_id.get(group_id)
+
+    async def members(self, group_id: str) -> List[str]:
+        group = await self.group(group_id)
+        return (group.members or []) if group is not None else []
+
+    async def contacts(self) -> List[responses.Contact]:
+        return (await self._load(self._contacts)).items
+
+    async def contact(self, number: str) -> Optional[responses.Contact]:
+        """Get a contact by its international phone number"""
+        key = phones.normalize(number) or number
+        return (await self._load(self._contacts)).by_id.get(key)
+
+    async def newsletters(self) -> List[responses.Newsletter]:
+        return (await self._load(self._newsletters)).items
+
+    async def newsletter(self, newsletter_id: str) -> Optional[responses.Newsletter]:
+        return (await self._load(self._newsletters)).by_id.get(newsletter_id)
+
+    async def reachable(
+        self,
+        numbers: Iterable[str],
+        country_code: Optional[str] = None,
+        batch_size: int = 10000,
+    ) -> Dict[str, Optional[bool]]:
+        """Check whether each of `numbers` is on WhatsApp.
+
+        Numbers are looked up in the contacts index, fetched at most once for
+        the whole list, and map to the `found` flag of their contact, or None
+        when they are not contacts of the account (or invalid). National
+        numbers default to `country_code`. Known answers are cached.
+        """
+        result: Dict[str, Optional[bool]] = {}
+        found: Dict[str, Optional[bool]] = {}
+        by_id: Optional[Dict[str, responses.Contact]] = None
+        numbers = list(numbers)
+        keys = phones.normalize_each(numbers, country_code)
+        for i, (number, key) in enumerate(zip(numbers, keys), 1):
+            if key is None:
+                result[number] = None
+                continue
+            if self.reachability is not None:
+                if (cached := self.reachability.get(key)) is not None:
+                    result[number] = cached
+                    continue
+            if by_id is None:
+                by_id = (await self._load(self._contacts)).by_id
+            contact = by_id.get(key)
+            result[number] = found[key] = contact.info.found if contact else None
+            if i % batch_size == 0:
+                self._remember_reachability(found)
+                found = {}
+                # let other tasks run between batches of a long list
+                await asyncio.sleep(0)
+
+        self._remember_reachability(found)
+        return result
+
+    def _remember_reachability(self, found: Dict[str, Optional[bool]]):
+        if self.reachability is not None:
+            known = {key: value for key, value in found.items() if value is not None}
+            if known:
+                self.reachability.set_many(known)
@@ -0,0 +1,201 @@
+import asyncio
+import base64
+from dataclasses import dataclass
+import hashlib
+import re
+from typing import Awaitable, BinaryIO, Callable, List, Optional, Tuple, Union
+
+from aiohttp import ClientResponse
+from loguru import logger
+
+from whatsapp import errors, incoming
+from whatsapp.transport import Transport
+
+CHUNK_SIZE = 1 << 16
+MIN_PART_SIZE = 1 << 20
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+Writer = Callable[[int, bytes], None]
+
+
+@dataclass
+class DownloadedMedia:
+    id: str
+    mime_type: str
+    sha256: str
+    size: int
+    data: Optional[bytes] = None
+    """The content, unless it was written into a sink"""
+
+
+def sha256_matches(digest: bytes, expected: str) -> bool:
+    """Compare a sha256 digest with a hex or base64 encoded one"""
+    return expected.lower() == digest.hex() or expected == base64.b64encode(
+        digest
+    ).decode("ascii")
+
+
+def split_ranges(size: int, parts: int, min_part_size: int = MIN_PART_SIZE):
+    """Split `size` bytes into at most `parts` inclusive (start, end) ranges"""
+    parts = max(1, min(parts, size // min_part_size or 1))
+    part_size = -(-size // parts)
+    return [
+        (start, min(start + part_size, size) - 1) for start in range(0, size, part_size)
+    ]
+
+
+def _writer(target: Union[bytearray, BinaryIO]) -> Writer:
+    if isinstance(target, bytearray):
+
+        def write(offset: int, chunk: bytes):
+            target[offset : offset + len(chunk)] = chunk
+
+    else:
+
+        def write(offset: int, chunk: bytes):
+            # no await between seek and write, so parts can share the handle
+            target.seek(offset)
+            target.write(chunk)
+
+    return write
+
+
+async def _write_body(response: ClientResponse, write: Writer, offset: int = 0):
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        write(offset, chunk)
+        offset += len(chunk)
+    return offset
+
+
+async def _gather(*aws: Awaitable) -> list:
+    """`asyncio.gather`, cancelling and awaiting the other awaitables when
+    one fails, so none of them outlives the call"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _download_range(
+    transport: Transport, url: str, start: int, end: int, write: Writer
+):
+    headers = {"Range": f"bytes={start}-{end}"}
+    async with transport.request("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        if response.status != 206:
+            raise ValueError(f"Range {start}-{end} of {url} was not honored")
+        await _write_body(response, write, start)
+
+
+async def download(
+    transport: Transport,
+    url: str,
+    target: Optional[Union[bytearray, BinaryIO]] = None,
+    connections: int = 4,
+    min_part_size: int = MIN_PART_SIZE,
+) -> Union[bytes, int]:
+    """Download `url`, using parallel range requests when the host supports them.
+
+    The first range is requested as a probe; when the host answers with the full
+    body instead, the download falls back to that single stream, and when it
+    does not tell the full size, to a request without range. With a file
+    `target` the file is preallocated and every part is written in place, and
+    the size is returned; without one the content is returned as bytes.
+    """
+    headers = {"Range": f"bytes=0-{min_part_size - 1}"} if connections > 1 else {}
+    async with transport.request("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        if not headers or response.status != 206:
+            if headers:
+                logger.debug(f"Range requests are not supported by {url}")
+            if target is None:
+                return await response.read()
+            return await _write_body(response, _writer(target))
+
+        match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        if match is not None and match.group(3) != "*":
+            return await _download_ranges(
+                transport,
+                url,
+                response,
+                int(match.group(3)),
+                target,
+                connections,
+                min_part_size,
+            )
+
+    logger.debug(f"Size of {url} is unknown, downloading it in one request")
+    return await download(transport, url, target, connections=1)
+
+
+async def _download_ranges(
+    transport: Transport,
+    url: str,
+    response: ClientResponse,
+    size: int,
+    target: Optional[Union[bytearray, BinaryIO]],
+    connections: int,
+    min_part_size: int,
+) -> Union[bytes, int]:
+    """Download the rest of `url` in parallel, `response` is its first range"""
+    buffer = bytearray(size) if target is None else None
+    if target is not None:
+        target.truncate(size)
+    write = _writer(buffer if target is None else target)
+
+    rest = size - min_part_size
+    ranges: List[Tuple[int, int]] = (
+        split_ranges(rest, connections - 1, min_part_size) if rest > 0 else []
+    )
+    logger.debug(f"Downloading {size} bytes of {url} in {len(ranges) + 1} parts")
+    await _gather(
+        _write_body(response, write),
+        *(
+            _download_range(
+                transport, url, min_part_size + start, min_part_size + end, write
+            )
+            for start, end in ranges
+        ),
+    )
+    return bytes(buffer) if target is None else size
+
+
+async def download_incoming(
+    transport: Transport,
+    url: str,
+    media: incoming.Media,
+    sink: Optional[BinaryIO] = None,
+    verify: bool = True,
+) -> DownloadedMedia:
+    """Download incoming media, verifying its sha256 while streaming.
+
+    Raises `errors.MediaIntegrityError` when the content does not match the
+    sha256 of the webhook.
+    """
+    digest = hashlib.sha256()
+    chunks: List[bytes] = []
+    size = 0
+    async with transport.request("GET", url) as response:
+        response.raise_for_status()
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            if sink is None:
+                chunks.append(chunk)
+            else:
+                sink.write(chunk)
+
+    if verify and not sha256_matches(digest.digest(), media.sha256):
+        raise errors.MediaIntegrityError(f"sha256 mismatch for media {media.id}")
+
+    return DownloadedMedia(
+        media.id,
+        media.mime_type,
+        media.sha256,
+        size,
+        b"".join(chunks) if sink is None else None,
+    )
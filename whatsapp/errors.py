@@ -1,5 +1,8 @@
 from typing import Any
 
+# Cloud API error codes of rate limiting
+THROTTLING_ERROR_CODES = {4, 80007, 130429, 131048, 131056}
+
 
 class WhatsappError(Exception):
     pass
@@ -13,6 +16,28 @@ class NotLoggedInError(WhatsappError):
     pass
 
 
+class CircuitOpenError(WhatsappError):
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Circuit {key} is open, retry after {retry_after:.1f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class MediaIntegrityError(WhatsappError):
+    pass
+
+
+class MessageExpiredError(WhatsappError):
+    pass
+
+
+class UndeliverableRecipientError(WhatsappError):
+    def __init__(self, recipient: str, error_code: int):
+        super().__init__(f"Recipient {recipient} is undeliverable (error {error_code})")
+        self.recipient = recipient
+        self.error_code = error_code
+
+
 class RequestError(WhatsappError):
     def __init__(self, status: int, reason: str, message: str, data: Any):
         self.status = status
@@ -32,3 +57,9 @@ class CloudAPIError(WhatsappError):
             self.error_code = data.get("code", -1)
         else:
             self.error_code = -1
+
+
+def is_throttling(error: BaseException) -> bool:
+    if isinstance(error, CloudAPIError) and error.error_code in THROTTLING_ERROR_CODES:
+        return True
+    return getattr(error, "status", None) == 429
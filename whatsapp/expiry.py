@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from datetime import timedelta
+import inspect
+import time
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from whatsapp import messages
+
+
+@dataclass
+class ExpiryPolicy:
+    """Enforce the `ttl` of outgoing messages client side.
+
+    The ttl holds `timedelta` arguments, e.g. `{"minutes": 5}`, counted from
+    the `send` call. A message still waiting for a send slot when its ttl runs
+    out never reaches the network: `send` raises `MessageExpiredError`, and
+    the message is counted in `expired` and handed to `dead_letter`.
+    """
+
+    dead_letter: Optional[Callable[[messages.Message], Any]] = None
+    expired: int = 0
+
+    @staticmethod
+    def deadline(message: messages.Message) -> Optional[float]:
+        """The monotonic time `message` expires at, if it has a ttl"""
+        if not message.ttl:
+            return None
+        try:
+            ttl = timedelta(**message.ttl)
+        except TypeError:
+            logger.warning(f"Ignoring unsupported message ttl {message.ttl}")
+            return None
+        return time.monotonic() + ttl.total_seconds()
+
+    async def expire(self, message: messages.Message):
+        self.expired += 1
+        logger.debug(f"Dropping expired message to {message.to}")
+        if self.dead_letter is None:
+            return
+        try:
+            result = self.dead_letter(message)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.bind(error=e).warning("Dead letter handler failed")
@@ -0,0 +1,108 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from loguru import logger
+
+from whatsapp import messages, phones, responses
+from whatsapp.priority import Priority
+
+if TYPE_CHECKING:
+    from .client import Client
+    from .directory import Directory
+
+# participants of one group message
+MAX_PARTICIPANTS = 256
+
+
+@dataclass
+class FanOutStats:
+    messages: int = 0
+    sent: int = 0
+    failed: int = 0
+    # (group id, chunk number) -> error
+    errors: Dict[Tuple[str, int], Exception] = field(default_factory=dict, repr=False)
+
+
+def _audience(
+    group: responses.Group,
+    audience: Literal["group", "members", "admins"],
+    wanted: Optional[Set[str]],
+) -> Optional[List[str]]:
+    if audience == "group":
+        return None
+    targets = phones.normalize_many(
+        group.admins if audience == "admins" else group.members or []
+    )
+    if wanted is not None:
+        targets = [number for number in targets if number in wanted]
+    return targets
+
+
+async def fan_out(
+    client: "Client",
+    message: messages.Message,
+    group_ids: Iterable[str],
+    audience: Literal["group", "members", "admins"] = "group",
+    participants: Optional[Iterable[str]] = None,
+    directory: Optional["Directory"] = None,
+    chunk_size: int = MAX_PARTICIPANTS,
+    concurrency: int = 8,
+    priority: Priority = Priority.NORMAL,
+) -> FanOutStats:
+    """Send `message` to many groups.
+
+    With the `group` audience each group gets one message. With `members` or
+    `admins`, the message is addressed to those participants of each group
+    (only the ones in `participants`, if given), in messages of at most
+    `chunk_size` participants. Groups are looked up once, through the
+    `directory` cache when given. Up to `concurrency` messages are in flight;
+    failures are logged and counted.
+    """
+    groups = await (directory.groups() if directory else client.groups())
+    if isinstance(groups, responses.GroupsResponse):
+        groups = groups.data or []
+    by_id = {group.id: group for group in groups}
+    wanted = None if participants is None else set(phones.normalize_many(participants))
+
+    stats = FanOutStats()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(key: Tuple[str, int], data: messages.Message):
+        async with semaphore:
+            try:
+                await client.send(data=data, priority=priority)
+                stats.sent += 1
+            except Exception as e:
+                stats.failed += 1
+                stats.errors[key] = e
+                logger.bind(error=e).warning(f"Failed to send to group {key[0]}")
+
+    sends = []
+    for group_id in group_ids:
+        if (group := by_id.get(group_id)) is None:
+            logger.warning(f"Unknown group {group_id}")
+            continue
+        # every message gets its own id
+        update = {"to": group_id, "recipient_type": "group", "id": None}
+        targets = _audience(group, audience, wanted)
+        if targets is None:
+            sends.append(send((group_id, 0), message.copy(update=update)))
+            continue
+        for number, start in enumerate(range(0, len(targets), chunk_size)):
+            chunk = targets[start : start + chunk_size]
+            data = message.copy(update={**update, "participants": chunk})
+            sends.append(send((group_id, number), data))
+
+    stats.messages = len(sends)
+    await asyncio.gather(*sends)
+    return stats
@@ -0,0 +1,97 @@
+import asyncio
+from collections import deque
+import time
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """Hedge idempotent requests against tail latency.
+
+    When a request did not complete after the hedge delay, a second identical
+    request is sent and the first successful response wins; the other request
+    is cancelled. The delay is fixed when `delay` is given, otherwise it is the
+    `percentile` of the recent latencies, clamped to [min_delay, max_delay].
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: float = 2.0,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        self.delay = delay
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def hedge_delay(self) -> float:
+        if self.delay is not None:
+            return self.delay
+        if len(self._latencies) < self.min_samples:
+            return self.max_delay
+        latencies = sorted(self._latencies)
+        delay = latencies[
+            min(int(len(latencies) * self.percentile), len(latencies) - 1)
+        ]
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    @property
+    def hedge_win_rate(self) -> float:
+        """How often a fired hedge returned first"""
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+    async def _timed(self, request: Callable[[], Awaitable[T]]) -> T:
+        start = time.monotonic()
+        try:
+            result = await request()
+        except asyncio.CancelledError:
+            # a lost request took at least that long, leaving it out would
+            # lower the percentile
+            self._latencies.append(time.monotonic() - start)
+            raise
+        self._latencies.append(time.monotonic() - start)
+        return result
+
+    async def run(self, request: Callable[[], Awaitable[T]]) -> T:
+        self.requests += 1
+        primary = asyncio.ensure_future(self._timed(request))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if done:
+                return primary.result()
+
+            self.hedged += 1
+            logger.debug(f"Hedging request after {self.hedge_delay:.3f}s")
+            hedge = asyncio.ensure_future(self._timed(request))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # both failed
+            return primary.result()
+        finally:
+            # the loser, or every request when the caller is cancelled
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+import hashlib
+import random
+import secrets
+
+from aioretry import RetryInfo, RetryPolicy, RetryPolicyStrategy
+
+from whatsapp import errors
+from whatsapp.breaker import CircuitBreaker
+
+
+class MessageIds:
+    """Ids of outgoing messages, for safe retries.
+
+    Every send gets a new random id, kept across the retries of that send
+    only: the server can drop the duplicates of a retried request, while a
+    repeated message is never mistaken for one. Ids are shaped like WhatsApp
+    Web ids (`prefix` and 18 hex digits), the ids of up to `max_size` sends
+    in flight are kept so that no two of them share an id.
+
+    A send given an idempotency key gets the id derived from the key instead,
+    so that sending again with the same key, e.g. after a restart, is dropped
+    as a duplicate.
+    """
+
+    def __init__(self, max_size: int = 10000, prefix="3EB0"):
+        self.max_size = max_size
+        self.prefix = prefix
+        self._in_flight: "OrderedDict[str, None]" = OrderedDict()
+
+    def acquire(self) -> str:
+        """A new id, not used by another send in flight"""
+        while (id := self.prefix + secrets.token_hex(9).upper()) in self._in_flight:
+            pass
+        self._in_flight[id] = None
+        if len(self._in_flight) > self.max_size:
+            self._in_flight.popitem(last=False)
+        return id
+
+    def derive(self, key: str) -> str:
+        """The id of the sends with idempotency key `key`"""
+        return derive_id(key, self.prefix)
+
+    def release(self, id: str):
+        """The send of `id` is over, successfully or not"""
+        self._in_flight.pop(id, None)
+
+    def __len__(self):
+        return len(self._in_flight)
+
+
+def derive_id(key: str, prefix="3EB0") -> str:
+    """A message id derived from an idempotency key, shaped like the ids of
+    `MessageIds`"""
+    return prefix + hashlib.sha256(key.encode()).hexdigest()[:18].upper()
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a request failing with `error` may succeed when retried"""
+    return CircuitBreaker.is_failure(error) or errors.is_throttling(error)
+
+
+def retry_policy(
+    attempts: int = 5, base_delay: float = 0.5, max_delay: float = 10.0
+) -> RetryPolicy:
+    """An aioretry policy retrying transient errors with exponential backoff
+    and full jitter"""
+
+    def policy(info: RetryInfo) -> RetryPolicyStrategy:
+        if info.fails >= attempts or not is_transient(info.exception):
+            return True, 0
+        return False, random.uniform(0, min(base_delay * 2**info.fails, max_delay))
+
+    return policy
@@ -172,8 +172,15 @@ class Message(BaseModel):
     class Config:
         use_enum_values = True
 
-    def media(self):
-        return self.image or self.audio or self.video or self.voice
+    def media(self) -> Optional[Media]:
+        return (
+            self.image
+            or self.audio
+            or self.video
+            or self.voice
+            or self.document
+            or self.sticker
+        )
 
 
 class PrivateMessage(Message):
@@ -1,3 +1,5 @@
+from dataclasses import dataclass, replace
+import json
 from typing import Any, Dict, List, Literal, Optional, Union
 from pydantic import BaseModel, Field
 from whatsapp._models.contacts import Contact, Contacts
@@ -101,3 +103,28 @@ class Message(BaseModel):
 
     class Config:
         use_enum_values = True
+
+
+@dataclass
+class SerializedMessage:
+    """A message serialized ahead of time, e.g. rendered by `TemplateCampaign`.
+
+    `body` is the json of a `Message` without `id` and `preview_url`, which
+    are added when sending, `to` and `ttl` are those of the message.
+    """
+
+    body: str
+    to: Optional[str] = None
+    ttl: Optional[Dict[str, Any]] = None
+    id: Optional[str] = None
+    preview_url: Optional[bool] = None
+
+    def copy(self, update: Dict[str, Any]) -> "SerializedMessage":
+        return replace(self, **update)
+
+    def json(self) -> str:
+        fields = {"id": self.id, "preview_url": self.preview_url}
+        fields = {name: value for name, value in fields.items() if value is not None}
+        if not fields:
+            return self.body
+        return json.dumps(fields)[:-1] + ", " + self.body.lstrip()[1:]
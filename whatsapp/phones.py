@@ -0,0 +1,108 @@
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from loguru import logger
+
+# E.164 numbers have at most 15 digits, country code included
+MIN_DIGITS = 8
+MAX_DIGITS = 15
+BATCH_SIZE = 10000
+
+
+class _DigitsTable(Dict[int, Optional[str]]):
+    """str.translate table keeping digits (as ascii), `+` and newlines.
+
+    Other code points are resolved once, on first sight, then served from
+    the dict.
+    """
+
+    def __missing__(self, code_point: int) -> Optional[str]:
+        digit = unicodedata.digit(chr(code_point), None)
+        self[code_point] = value = None if digit is None else str(digit)
+        return value
+
+
+_DIGITS = _DigitsTable({ord("+"): "+", ord("\n"): "\n"})
+
+
+def _international(numbers: List[str], country_code: Optional[str]) -> List[str]:
+    """Strip symbols and prefixes of a batch of numbers, in a few passes over
+    the whole batch joined in one string. Invalid numbers are left invalid,
+    see `_valid`."""
+    joined = "\n" + "\n".join(numbers).translate(_DIGITS)
+    if joined.count("\n") != len(numbers):
+        # some numbers contain newlines
+        return [
+            _international([number.replace("\n", " ")], country_code)[0]
+            for number in numbers
+        ]
+
+    # `#` marks international numbers, so that their 0 is not taken for a
+    # national prefix; country codes never start with 0, so these are invalid
+    joined = joined.replace("\n+", "\n#").replace("\n00", "\n#")
+    joined = joined.replace("\n0", "\n" + (country_code or "!"))
+    joined = joined.replace("#0", "!").replace("#", "")
+    return joined.split("\n")[1:]
+
+
+def _valid(digits: str) -> bool:
+    return MIN_DIGITS <= len(digits) <= MAX_DIGITS and digits.isdigit()
+
+
+def normalize(number: str, country_code: Optional[str] = None) -> Optional[str]:
+    """Normalize a phone number to its international digits, e.g. 972501234567.
+
+    Symbols and spaces are dropped and a leading `+` or `00` is removed, the
+    country code that follows must not start with 0.
+    National numbers (with a leading 0) get `country_code` instead of the 0,
+    or are invalid without one. Returns None for invalid numbers.
+    """
+    if country_code is not None:
+        country_code = country_code.lstrip("+")
+    digits = _international([number.strip()], country_code)[0]
+    return digits if _valid(digits) else None
+
+
+def _batches(numbers: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for number in numbers:
+        batch.append(number)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def normalize_each(
+    numbers: Iterable[str], country_code: Optional[str] = None
+) -> List[Optional[str]]:
+    """Normalize many numbers at once, see `normalize`.
+
+    Returns one result per number, in order, with None for invalid numbers.
+    """
+    if country_code is not None:
+        country_code = country_code.lstrip("+")
+
+    result: List[Optional[str]] = []
+    for batch in _batches(numbers, BATCH_SIZE):
+        result.extend(
+            digits if _valid(digits) else None
+            for digits in _international(batch, country_code)
+        )
+    return result
+
+
+def normalize_many(
+    numbers: Iterable[str], country_code: Optional[str] = None, dedup: bool = True
+) -> List[str]:
+    """Normalize many numbers at once, see `normalize`.
+
+    Invalid numbers are dropped and, with `dedup`, so are repeated ones (the
+    first occurrence is kept).
+    """
+    normalized = normalize_each(numbers, country_code)
+    result = [digits for digits in normalized if digits is not None]
+    if invalid := len(normalized) - len(result):
+        logger.debug(f"Dropped {invalid} invalid phone numbers")
+    return list(dict.fromkeys(result)) if dedup else result
@@ -0,0 +1,142 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Optional, Union
+
+from loguru import logger
+
+from whatsapp import downloads, incoming
+
+if TYPE_CHECKING:
+    from .client import Client
+
+
+@dataclass
+class PrefetchedMedia:
+    info: downloads.DownloadedMedia
+    # positioned at the start of the content
+    file: BinaryIO
+
+    def read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+
+class MediaPrefetcher:
+    """Download the media of incoming messages before their handlers ask.
+
+    `prefetch` starts downloading the media of the messages of an update,
+    `concurrency` at a time, each into a spool held in memory up to
+    `spool_size` bytes and spilled to a temporary file beyond. Handlers `get`
+    the media, awaiting the download already in flight. At most `max_pending`
+    unclaimed media are kept, the oldest are dropped beyond that, so memory
+    stays under `max_pending * spool_size`.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        concurrency: int = 4,
+        spool_size: int = 1 << 20,
+        max_pending: int = 64,
+        verify: bool = True,
+    ):
+        self.client = client
+        self.concurrency = concurrency
+        self.spool_size = spool_size
+        self.max_pending = max_pending
+        self.verify = verify
+
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: "OrderedDict[str, asyncio.Task]" = OrderedDict()
+
+    def prefetch(self, update: incoming.WebhookUpdate) -> int:
+        """Start downloading the media of `update`, return the number started"""
+        started = 0
+        for message in update.messages or []:
+            media = message.media()
+            if media is None or media.id in self._pending:
+                continue
+            task = asyncio.ensure_future(self._download(media))
+            task.add_done_callback(self._log_failure)
+            self._pending[media.id] = task
+            started += 1
+
+        while len(self._pending) > self.max_pending:
+            _, task = self._pending.popitem(last=False)
+            self.dropped += 1
+            self._discard(task)
+        return started
+
+    def wrap(self, handler: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """A webhook handler prefetching the media of each update, then
+        calling `handler` with it"""
+
+        def wrapped(update):
+            if isinstance(update, incoming.WebhookUpdate):
+                self.prefetch(update)
+            return handler(update)
+
+        return wrapped
+
+    async def get(
+        self, media: Union[incoming.Media, incoming.Message]
+    ) -> PrefetchedMedia:
+        """The content of `media`, downloaded now unless it was prefetched.
+        The caller owns the result and should close it."""
+        if isinstance(media, incoming.Message):
+            if (media := media.media()) is None:
+                raise ValueError("Message has no media")
+
+        task = self._pending.pop(media.id, None)
+        if task is None:
+            self.misses += 1
+            return await self._download(media)
+        self.hits += 1
+        return await task
+
+    async def _download(self, media: incoming.Media) -> PrefetchedMedia:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        spool = SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            async with self._semaphore:
+                info = await self.client.download(media, spool, self.verify)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return PrefetchedMedia(info, spool)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.bind(error=task.exception()).debug("Media prefetch failed")
+
+    @staticmethod
+    def _close_result(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is None:
+            task.result().close()
+
+    @classmethod
+    def _discard(cls, task: asyncio.Task):
+        task.cancel()
+        # a task may still finish with its media when cancelled as it completes
+        task.add_done_callback(cls._close_result)
+
+    async def close(self):
+        """Drop all unclaimed media"""
+        tasks = list(self._pending.values())
+        self._pending.clear()
+        for task in tasks:
+            self._discard(task)
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,103 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Deque, Dict, Optional
+
+
+class Priority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    BULK = "bulk"
+
+
+DEFAULT_WEIGHTS = {Priority.HIGH: 8, Priority.NORMAL: 4, Priority.BULK: 1}
+
+
+class PriorityScheduler:
+    """Share `capacity` in-flight sends between priority lanes.
+
+    Each priority has its own queue. Freed slots go to the waiting lanes in
+    proportion to their `weights` (stride scheduling), and the last `reserved`
+    slots are only used by high priority sends, so that transactional
+    messages never wait behind a bulk burst.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10,
+        weights: Optional[Dict[Priority, int]] = None,
+        reserved: int = 2,
+    ):
+        if reserved >= capacity:
+            raise ValueError("reserved must be lower than capacity")
+
+        self.capacity = capacity
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.reserved = reserved
+        self.in_flight = 0
+
+        self._queues: Dict[Priority, Deque[asyncio.Future]] = {
+            priority: deque() for priority in Priority
+        }
+        self._passes: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+        self._virtual_time = 0.0
+
+    def queued(self, priority: Priority) -> int:
+        return len(self._queues[priority])
+
+    def _has_room(self, priority: Priority) -> bool:
+        if priority == Priority.HIGH:
+            return self.in_flight < self.capacity
+        return self.in_flight < self.capacity - self.reserved
+
+    def _next_lane(self) -> Optional[Priority]:
+        lanes = [
+            priority
+            for priority, queue in self._queues.items()
+            if queue and self._has_room(priority)
+        ]
+        return min(lanes, key=self._passes.__getitem__, default=None)
+
+    def _grant(self, priority: Priority):
+        self.in_flight += 1
+        # a lane coming back from idle does not get credit for its idle time
+        start = max(self._passes[priority], self._virtual_time)
+        self._virtual_time = start
+        self._passes[priority] = start + 1 / self.weights[priority]
+
+    def _wake(self):
+        while (priority := self._next_lane()) is not None:
+            waiter = self._queues[priority].popleft()
+            if not waiter.done():
+                self._grant(priority)
+                waiter.set_result(None)
+
+    async def _acquire(self, priority: Priority):
+        if not self._queues[priority] and self._has_room(priority):
+            self._grant(priority)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            elif waiter in self._queues[priority]:
+                self._queues[priority].remove(waiter)
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.NORMAL):
+        """Hold one in-flight slot of the `priority` lane"""
+        await self._acquire(Priority(priority))
+        try:
+            yield
+        finally:
+            self._release()
@@ -0,0 +1,90 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from loguru import logger
+
+SendReadMark = Callable[[str], Awaitable[Any]]
+
+
+@dataclass
+class _PendingMark:
+    message_id: str
+    send: SendReadMark
+    future: asyncio.Future
+    timestamp: Optional[int] = None
+    task: Optional[asyncio.Task] = None
+
+
+@dataclass
+class ReadMarkCoalescer:
+    """Send at most one read mark per chat within `window` seconds.
+
+    Marking a message as read marks every earlier message of the chat as read,
+    so only the newest message seen during the window is sent and the others
+    are dropped. Messages are ordered by their webhook `timestamp` when given,
+    otherwise the last call wins. All callers of the window share the same
+    response.
+    """
+
+    window: float = 1.0
+    sent: int = 0
+    dropped: int = 0
+
+    _pending: Dict[str, _PendingMark] = field(default_factory=dict, repr=False)
+
+    async def mark(
+        self,
+        chat_id: str,
+        message_id: str,
+        send: SendReadMark,
+        timestamp: Union[int, str, None] = None,
+    ) -> Any:
+        timestamp = int(timestamp) if timestamp is not None else None
+        pending = self._pending.get(chat_id)
+        if pending is not None:
+            self.dropped += 1
+            if (
+                timestamp is None
+                or pending.timestamp is None
+                or timestamp >= pending.timestamp
+            ):
+                pending.message_id = message_id
+                pending.timestamp = timestamp
+        else:
+            pending = _PendingMark(
+                message_id,
+                send,
+                asyncio.get_running_loop().create_future(),
+                timestamp,
+            )
+            pending.task = asyncio.create_task(self._send_later(chat_id))
+            self._pending[chat_id] = pending
+
+        return await asyncio.shield(pending.future)
+
+    async def flush(self):
+        """Send all pending read marks now."""
+        for chat_id, pending in list(self._pending.items()):
+            if self._pending.get(chat_id) is not pending:
+                continue  # sent by its own timer meanwhile
+            # a mark is still pending only while its task sleeps
+            pending.task.cancel()
+            await self._send(chat_id)
+
+    async def _send_later(self, chat_id: str):
+        await asyncio.sleep(self.window)
+        await self._send(chat_id)
+
+    async def _send(self, chat_id: str):
+        pending = self._pending.pop(chat_id)
+        logger.debug(f"Sending read mark for {chat_id}: {pending.message_id}")
+        self.sent += 1
+        try:
+            pending.future.set_result(await pending.send(pending.message_id))
+        except Exception as e:
+            pending.future.set_exception(e)
+        finally:
+            if not pending.future.done():
+                # cancelled mid-send, the callers must not wait forever
+                pending.future.cancel()
@@ -0,0 +1,75 @@
+from typing import Dict, Optional
+
+from loguru import logger
+
+from whatsapp import errors, incoming, phones
+from whatsapp.cache import ExpiringCache
+
+DAY = 24 * 60 * 60
+
+# Cloud API error codes of undeliverable recipients -> seconds to skip them
+DEFAULT_TTLS: Dict[int, float] = {
+    131026: 7 * DAY,  # message undeliverable, e.g. not a WhatsApp user
+    131021: 30 * DAY,  # recipient is the sender
+    131030: DAY,  # not in the allowed list of a test number
+}
+
+
+class RecipientCache(ExpiringCache):
+    """Recipients known to be undeliverable, with the error code that marked them.
+
+    Fed from send errors and status callbacks: each error code in `ttls` marks
+    the recipient for its ttl, other codes are ignored. Entries are all kept
+    in memory, so checks never touch the database.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[int, float]] = None,
+        path: Optional[str] = None,
+        table: str = "recipients",
+    ):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        super().__init__(max(self.ttls.values()), path, table, preload=True)
+        self.skipped = 0
+
+    @staticmethod
+    def key(recipient: str) -> str:
+        return phones.normalize(recipient) or recipient
+
+    def mark(self, recipient: str, error_code: int) -> bool:
+        """Mark `recipient` undeliverable if `error_code` is a recipient error"""
+        ttl = self.ttls.get(error_code)
+        if ttl is None:
+            return False
+        logger.debug(f"Skipping {recipient} for {ttl:.0f}s after error {error_code}")
+        self.set(self.key(recipient), error_code, ttl)
+        return True
+
+    def error_code(self, recipient: str) -> Optional[int]:
+        """The error code `recipient` is marked with, if any"""
+        return self.get(self.key(recipient))
+
+    def check(self, recipient: str):
+        """Raise `UndeliverableRecipientError` for a marked recipient"""
+        if (error_code := self.error_code(recipient)) is not None:
+            self.skipped += 1
+            raise errors.UndeliverableRecipientError(recipient, error_code)
+
+    def record_error(self, recipient: str, error: BaseException) -> bool:
+        if isinstance(error, errors.CloudAPIError):
+            return self.mark(recipient, error.error_code)
+        return False
+
+    def record_status(self, status: incoming.Status) -> bool:
+        recipient = status.recipient_id or (
+            status.message and status.message.recipient_id
+        )
+        if not recipient or not status.errors:
+            return False
+        return any([self.mark(recipient, error.code) for error in status.errors])
+
+    def record_update(self, update: incoming.WebhookUpdate):
+        """Record the failed statuses of a webhook update"""
+        for status in update.statuses or []:
+            self.record_status(status)
@@ -0,0 +1,112 @@
+import asyncio
+from dataclasses import dataclass
+import inspect
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Union
+
+from loguru import logger
+from pydantic import ValidationError
+
+from whatsapp import incoming
+
+Update = Union[incoming.WebhookUpdate, Dict[str, Any]]
+Handler = Callable[[Update], Union[Awaitable[Any], Any]]
+
+
+@dataclass
+class ReplayStats:
+    updates: int = 0
+    parse_errors: int = 0
+    handler_errors: int = 0
+    parse_time: float = 0.0
+    handler_time: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def parse_rate(self) -> float:
+        """Updates parsed per second of parsing"""
+        return self.updates / self.parse_time if self.parse_time else 0.0
+
+    @property
+    def handler_rate(self) -> float:
+        """Updates handled per second of handler time"""
+        return self.updates / self.handler_time if self.handler_time else 0.0
+
+    @property
+    def rate(self) -> float:
+        """Updates replayed per second"""
+        return self.updates / self.elapsed if self.elapsed else 0.0
+
+
+def read_updates(
+    path: str, fast: bool = False, stats: Optional[ReplayStats] = None
+) -> Iterator[Update]:
+    """Lazily read a file of newline delimited webhook bodies.
+
+    Bodies are parsed through `incoming.Updates`, or only json decoded when
+    `fast` is set. Invalid lines are logged, counted and skipped.
+    """
+    stats = stats or ReplayStats()
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            start = time.perf_counter()
+            try:
+                update = json.loads(line)
+                if not fast:
+                    update = incoming.Updates.parse_obj(update).__root__
+            except (ValueError, ValidationError) as e:
+                stats.parse_errors += 1
+                logger.bind(error=e).warning(f"Failed to parse line {number}")
+                continue
+            finally:
+                stats.parse_time += time.perf_counter() - start
+            yield update
+
+
+async def replay(
+    path: str,
+    handler: Handler,
+    rate: Optional[float] = None,
+    concurrency: int = 1,
+    fast: bool = False,
+) -> ReplayStats:
+    """Feed the updates of an ndjson file into `handler`.
+
+    Updates are released at `rate` per second, or as fast as possible, with up
+    to `concurrency` handler calls in flight.
+    """
+    stats = ReplayStats()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def handle(update: Update):
+        start = time.perf_counter()
+        try:
+            result = handler(update)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            stats.handler_errors += 1
+            logger.bind(error=e).warning("Handler failed")
+        finally:
+            stats.handler_time += time.perf_counter() - start
+            semaphore.release()
+
+    start = time.perf_counter()
+    for update in read_updates(path, fast, stats):
+        if rate:
+            delay = start + stats.updates / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await semaphore.acquire()
+        stats.updates += 1
+        task = asyncio.ensure_future(handle(update))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks)
+    stats.elapsed = time.perf_counter() - start
+    return stats
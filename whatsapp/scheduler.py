@@ -0,0 +1,236 @@
+import asyncio
+import heapq
+import itertools
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from whatsapp import messages
+from whatsapp.priority import Priority
+
+if TYPE_CHECKING:
+    from .client import Client
+
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+def _key(due: float, id: int) -> int:
+    # due time in ms and id packed in one int: cheaper than a tuple per entry,
+    # and ordered by due time then scheduling order
+    return int(due * 1000) << _ID_BITS | id
+
+
+def _due(key: int) -> float:
+    return (key >> _ID_BITS) / 1000
+
+
+class SendScheduler:
+    """Send messages at given times.
+
+    Scheduled messages are kept serialized, in memory or, when `path` is
+    given, in a local sqlite database; the in-memory timer is a heap of one
+    int per message. Due messages are released through `client.send` in
+    batches of `batch_size`, `concurrency` at a time.
+
+    Due times are wall clock times. The heap is checked at least every
+    `max_sleep` seconds, so messages whose time came with a jump of the wall
+    clock are released within that delay.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        path: Optional[str] = None,
+        table: str = "scheduled",
+        batch_size: int = 100,
+        concurrency: int = 10,
+        max_sleep: float = 1.0,
+        priority: Priority = Priority.NORMAL,
+    ):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_sleep = max_sleep
+        self.priority = priority
+
+        self.sent = 0
+        self.failed = 0
+
+        self._heap: List[int] = []
+        self._payloads: Dict[int, str] = {}
+        self._cancelled = 0
+        # ids taken into the batch being sent, no longer cancellable
+        self._in_flight: Set[int] = set()
+        self._ids = itertools.count(1)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            with self._db:
+                self._db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    "(id INTEGER PRIMARY KEY, due REAL, payload TEXT)"
+                )
+            self._heap = [
+                _key(due, id)
+                for id, due in self._db.execute(f"SELECT id, due FROM {table}")
+            ]
+            heapq.heapify(self._heap)
+            last_id = max((key & _ID_MASK for key in self._heap), default=0)
+            self._ids = itertools.count(last_id + 1)
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap) - self._cancelled
+
+    def schedule(self, message: messages.Message, at: float) -> int:
+        """Send `message` at the `at` timestamp, return its schedule id"""
+        return self.schedule_many([(message, at)])[0]
+
+    def schedule_in(self, message: messages.Message, delay: float) -> int:
+        return self.schedule(message, time.time() + delay)
+
+    def schedule_many(
+        self, items: Iterable[Tuple[messages.Message, float]]
+    ) -> List[int]:
+        rows = [
+            (next(self._ids), at, message.json(exclude_none=True))
+            for message, at in items
+        ]
+        if self._db is not None:
+            with self._db:
+                self._db.executemany(f"INSERT INTO {self.table} VALUES (?, ?, ?)", rows)
+        else:
+            self._payloads.update((id, payload) for id, _, payload in rows)
+
+        head = self._heap[0] if self._heap else None
+        for id, at, _ in rows:
+            heapq.heappush(self._heap, _key(at, id))
+        if self._wakeup is not None and (head is None or self._heap[0] < head):
+            self._wakeup.set()
+        return [id for id, _, _ in rows]
+
+    def cancel(self, id: int) -> bool:
+        """Cancel a scheduled message, if not released yet"""
+        if id in self._in_flight:
+            return False
+        if self._db is not None:
+            with self._db:
+                cursor = self._db.execute(
+                    f"DELETE FROM {self.table} WHERE id = ?", (id,)
+                )
+            cancelled = cursor.rowcount > 0
+        else:
+            cancelled = self._payloads.pop(id, None) is not None
+        # the heap entry is dropped when it comes due
+        self._cancelled += cancelled
+        return cancelled
+
+    def _pop_due(self, now: float) -> List[int]:
+        ids = []
+        while self._heap and len(ids) < self.batch_size and _due(self._heap[0]) <= now:
+            ids.append(heapq.heappop(self._heap) & _ID_MASK)
+        return ids
+
+    def _take_payloads(self, ids: List[int]) -> Dict[int, str]:
+        if self._db is None:
+            payloads = {
+                id: self._payloads.pop(id) for id in ids if id in self._payloads
+            }
+        else:
+            marks = ",".join("?" * len(ids))
+            payloads = dict(
+                self._db.execute(
+                    f"SELECT id, payload FROM {self.table} WHERE id IN ({marks})", ids
+                )
+            )
+        self._cancelled -= len(ids) - len(payloads)
+        return payloads
+
+    def _forget(self, id: int):
+        self._in_flight.discard(id)
+        if self._db is not None:
+            with self._db:
+                self._db.execute(f"DELETE FROM {self.table} WHERE id = ?", (id,))
+
+    async def release_due(self) -> int:
+        """Send the next batch of due messages, return the number released"""
+        ids = self._pop_due(time.time())
+        if not ids:
+            return 0
+
+        payloads = self._take_payloads(ids)
+        self._in_flight.update(payloads)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(id: int, payload: str):
+            async with semaphore:
+                try:
+                    await self.client.send(
+                        data=messages.Message.parse_raw(payload),
+                        priority=self.priority,
+                    )
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.bind(error=e).warning(f"Scheduled message {id} failed")
+                # forgotten one by one, an interrupted batch does not send
+                # its sent messages again on restart
+                self._forget(id)
+
+        try:
+            await asyncio.gather(
+                *(send(id, payload) for id, payload in payloads.items())
+            )
+        finally:
+            self._in_flight.difference_update(payloads)
+        return len(ids)
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            if await self.release_due():
+                continue
+
+            self._wakeup.clear()
+            delay = self.max_sleep
+            if self._heap:
+                delay = min(max(_due(self._heap[0]) - time.time(), 0), delay)
+
+            wall, monotonic = time.time(), time.monotonic()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            jump = (time.time() - wall) - (time.monotonic() - monotonic)
+            if abs(jump) > 1:
+                logger.warning(f"Wall clock jumped by {jump:.1f}s")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
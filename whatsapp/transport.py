@@ -0,0 +1,382 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import hashlib
+from http import HTTPStatus
+import json
+import re
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Match,
+    MutableMapping,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+from aiohttp import (
+    ClientConnectionError,
+    ClientResponseError,
+    ClientSession,
+    ContentTypeError,
+    RequestInfo,
+)
+from multidict import CIMultiDict, CIMultiDictProxy
+from pydantic import BaseModel
+from yarl import URL
+
+from whatsapp import responses
+
+
+class Transport:
+    """The HTTP layer of the client.
+
+    `request` is an async context manager yielding a response with the subset
+    of `aiohttp.ClientResponse` used by the client: `status`, `reason`,
+    `headers`, `read()`, `text()`, `json()`, `raise_for_status()` and
+    `content.iter_chunked()`. Transports raise aiohttp exceptions, so error
+    handling does not depend on the transport.
+    """
+
+    @property
+    def headers(self) -> MutableMapping[str, str]:
+        """Headers sent with every request"""
+        raise NotImplementedError
+
+    def request(self, method: str, url: str, **kwargs):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class AiohttpTransport(Transport):
+    """HTTP/1.1 over an aiohttp session, the default transport"""
+
+    def __init__(self, session: ClientSession):
+        self.session = session
+
+    @property
+    def headers(self) -> MutableMapping[str, str]:
+        return self.session.headers
+
+    def request(self, method: str, url: str, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+
+class _HttpxContent:
+    def __init__(self, response):
+        self._response = response
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        async for chunk in self._response.aiter_bytes(size):
+            yield chunk
+
+
+class _Response:
+    """The parts of `aiohttp.ClientResponse` shared by the other transports"""
+
+    method: str
+    status: int
+    reason: str
+    headers: CIMultiDictProxy
+
+    @property
+    def request_info(self) -> RequestInfo:
+        raise NotImplementedError
+
+    async def text(self) -> str:
+        raise NotImplementedError
+
+    async def json(self) -> Any:
+        content_type = self.headers.get("Content-Type", "")
+        if "json" not in content_type:
+            raise ContentTypeError(
+                self.request_info,
+                (),
+                status=self.status,
+                message=f"Attempt to decode JSON with unexpected mimetype: {content_type}",
+                headers=self.headers,
+            )
+        return json.loads(await self.text())
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise ClientResponseError(
+                self.request_info,
+                (),
+                status=self.status,
+                message=self.reason,
+                headers=self.headers,
+            )
+
+
+class _HttpxResponse(_Response):
+    """An httpx response behaving like an aiohttp one"""
+
+    def __init__(self, method: str, response):
+        self._response = response
+        self.method = method
+        self.status = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = CIMultiDictProxy(CIMultiDict(response.headers.multi_items()))
+        self.content = _HttpxContent(response)
+
+    @property
+    def request_info(self) -> RequestInfo:
+        url = URL(str(self._response.url))
+        return RequestInfo(url, self.method, CIMultiDictProxy(CIMultiDict()), url)
+
+    async def read(self) -> bytes:
+        return await self._response.aread()
+
+    async def text(self) -> str:
+        await self._response.aread()
+        return self._response.text
+
+
+class HttpxTransport(Transport):
+    """HTTP/2 over httpx, needs `httpx[http2]`.
+
+    Concurrent requests are multiplexed over a few connections to hosts that
+    negotiate HTTP/2 (over TLS); other hosts are served over HTTP/1.1.
+    Multipart bodies (`upload_file`) are not supported.
+    """
+
+    def __init__(self, http2: bool = True, timeout: Optional[float] = 300, **kwargs):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "HttpxTransport requires httpx[http2], see the http2 extra"
+            ) from e
+
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(http2=http2, timeout=timeout, **kwargs)
+
+    @property
+    def headers(self) -> MutableMapping[str, str]:
+        return self.client.headers
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        data = kwargs.pop("data", None)
+        if not data:
+            # the client passes an empty body with requests without one
+            pass
+        elif isinstance(data, dict):
+            kwargs["data"] = data
+        elif isinstance(data, (bytes, str)):
+            kwargs["content"] = data
+        else:
+            # e.g. aiohttp FormData
+            raise TypeError(f"Unsupported body {type(data).__name__}")
+
+        request = self.client.build_request(method, url, **kwargs)
+        try:
+            response = await self.client.send(request, stream=True)
+        except self._httpx.TimeoutException as e:
+            raise asyncio.TimeoutError() from e
+        except self._httpx.TransportError as e:
+            raise ClientConnectionError(str(e)) from e
+
+        try:
+            yield _HttpxResponse(method, response)
+        finally:
+            await response.aclose()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+@dataclass
+class FakeRequest:
+    method: str
+    url: str
+    headers: Dict[str, str]
+    params: Optional[Dict[str, Any]] = None
+    json: Any = None
+    data: Any = None
+    match: Optional[Match] = None
+
+
+Body = Union[BaseModel, Dict[str, Any], List[Any], bytes, str, None]
+Reply = Union[Body, Tuple[int, Body]]
+Route = Union[Reply, Callable[[FakeRequest], Reply]]
+
+
+class _FakeContent:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        for start in range(0, len(self._body), size):
+            yield self._body[start : start + size]
+
+
+class _FakeResponse(_Response):
+    def __init__(self, request: FakeRequest, status: int, body: Body):
+        self._request = request
+        self.method = request.method
+        self.status = status
+        self.reason = HTTPStatus(status).phrase
+
+        if isinstance(body, BaseModel):
+            body, content_type = body.json(exclude_none=True), "application/json"
+        elif isinstance(body, (dict, list)):
+            body, content_type = json.dumps(body), "application/json"
+        elif isinstance(body, str):
+            content_type = "text/plain"
+        else:
+            body, content_type = body or b"", "application/octet-stream"
+
+        self._body = body.encode() if isinstance(body, str) else body
+        self.headers = CIMultiDictProxy(
+            CIMultiDict(
+                {"Content-Type": content_type, "Content-Length": str(len(self._body))}
+            )
+        )
+        self.content = _FakeContent(self._body)
+
+    @property
+    def request_info(self) -> RequestInfo:
+        url = URL(self._request.url)
+        headers = CIMultiDictProxy(CIMultiDict(self._request.headers))
+        return RequestInfo(url, self.method, headers, url)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode()
+
+
+class FakeTransport(Transport):
+    """Serve canned responses in process, without sockets.
+
+    Meant for tests, load tests and profiling the client's own overhead.
+    `routes` maps `(method, pattern)` to a reply, where the pattern is a
+    regular expression matched against the end of the url path. A reply is a
+    body (a model, json data, text or bytes), a `(status, body)` tuple or a
+    callable building one from the `FakeRequest`. The given routes take
+    precedence over the defaults, which answer sends, uploads, groups, media
+    lookups and downloads of the media in `media`. Other requests get a 404.
+
+    Every request waits `latency` seconds, the last `history` requests are
+    kept in `requests`.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[Tuple[str, str], Route]] = None,
+        media: Optional[Dict[str, bytes]] = None,
+        latency: float = 0.0,
+        history: int = 100,
+    ):
+        self.media = dict(media or {})
+        self.latency = latency
+        self.requests: Deque[FakeRequest] = deque(maxlen=history)
+        self.count = 0
+
+        self._headers = CIMultiDict()
+        self._routes: List[Tuple[str, Pattern, Route]] = []
+        for (method, pattern), route in (routes or {}).items():
+            self.route(method, pattern, route)
+        self._defaults = [
+            (method, re.compile(f"(?:{pattern})$"), route)
+            for method, pattern, route in [
+                ("POST", r"/messages", self._send),
+                ("POST", r"/media", self._upload),
+                ("GET", r"/groups", responses.GroupsResponse(success=True, data=[])),
+                ("GET", r"/(?P<id>[^/]+)/content", self._media_content),
+                ("GET", r"/(?P<id>[^/]+)", self._media_lookup),
+            ]
+        ]
+
+    @property
+    def headers(self) -> MutableMapping[str, str]:
+        return self._headers
+
+    def route(self, method: str, pattern: str, reply: Route):
+        """Answer `method` requests whose path ends with `pattern` with `reply`"""
+        self._routes.append((method.upper(), re.compile(f"(?:{pattern})$"), reply))
+
+    def _match(self, request: FakeRequest) -> Optional[Route]:
+        path = urlsplit(request.url).path
+        for method, pattern, route in self._routes + self._defaults:
+            if method == request.method and (match := pattern.search(path)):
+                request.match = match
+                return route
+        return None
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        request = FakeRequest(
+            method.upper(),
+            url,
+            {**self._headers, **(kwargs.get("headers") or {})},
+            kwargs.get("params"),
+            kwargs.get("json"),
+            kwargs.get("data"),
+        )
+        self.count += 1
+        self.requests.append(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        route = self._match(request)
+        if route is None:
+            reply = 404, {"success": False, "message": f"No route for {method} {url}"}
+        else:
+            reply = route(request) if callable(route) else route
+
+        status, body = reply if isinstance(reply, tuple) else (200, reply)
+        yield _FakeResponse(request, status, body)
+
+    def _send(self, request: FakeRequest) -> Reply:
+        body = request.json
+        if body is None and isinstance(request.data, (str, bytes)):
+            body = json.loads(request.data)
+        to = (body or {}).get("to")
+        if to is None:
+            # read marks
+            return {"success": True}
+        return responses.MessageResponse(
+            success=True,
+            contacts=[{"input": to, "wa_id": to.lstrip("+")}],
+            messages=[{"id": f"wamid.fake{self.count}"}],
+        )
+
+    def _upload(self, request: FakeRequest) -> Reply:
+        media_id = f"fake-media-{self.count}"
+        if isinstance(request.data, bytes):
+            self.media[media_id] = request.data
+        return responses.UploadResponse(
+            success=True, media=[responses.UploadedMedia(id=media_id)]
+        )
+
+    def _media_lookup(self, request: FakeRequest) -> Reply:
+        media_id = request.match["id"]
+        if media_id not in self.media:
+            return 404, {"success": False, "message": f"Unknown media {media_id}"}
+        content = self.media[media_id]
+        return responses.MediaResponse(
+            url=f"{request.url}/content",
+            mime_type="application/octet-stream",
+            sha256=hashlib.sha256(content).hexdigest(),
+            file_size=str(len(content)),
+            id=media_id,
+        )
+
+    def _media_content(self, request: FakeRequest) -> Reply:
+        if (content := self.media.get(request.match["id"])) is None:
+            return 404, b""
+        return content